@@ -4,18 +4,37 @@ ChromaDB Client Modul
 Initialisiert und verwaltet die Verbindung zur ChromaDB Vektordatenbank
 mit Token-basierter Authentifizierung.
 
+Der Client wird erst beim ersten Zugriff erstellt, damit der Import der
+Anwendung nicht fehlschlägt, wenn ChromaDB kurzzeitig nicht erreichbar ist.
+
 Funktionen:
+- get_client(): Gibt den (gecachten) ChromaDB Client zurück
 - get_collection(): Gibt eine Collection aus ChromaDB zurück oder erstellt sie
+- build_collection_name(): Erstellt einen gültigen Collection-Namen für einen Upload
+- tenant_prefix(): Präfix der Collection-Namen eines Mandanten
 """
 
-import chromadb
-from .config import settings
+import re
+from functools import lru_cache
 
-# Verbindung zu ChromaDB mit Token-Authentifizierung
-client = chromadb.HttpClient(
-    host=settings.chroma_url,
-    headers={settings.chroma_auth_token_transport_header: settings.chroma_auth_token}
-)
+from .config import get_settings
+
+@lru_cache
+def get_client():
+    """
+    Erstellt die Verbindung zu ChromaDB mit Token-Authentifizierung (beim ersten Aufruf).
+    
+    Returns:
+        chromadb.HttpClient: Der ChromaDB Client
+    """
+    # Schwerer Import, erst bei Bedarf laden
+    import chromadb
+    
+    settings = get_settings()
+    return chromadb.HttpClient(
+        host=settings.chroma_url,
+        headers={settings.chroma_auth_token_transport_header: settings.chroma_auth_token}
+    )
 
 def get_collection(name):
     """
@@ -27,4 +46,34 @@ def get_collection(name):
     Returns:
         chromadb.Collection: Die angeforderte Collection
     """
-    return client.get_or_create_collection(name)
+    return get_client().get_or_create_collection(name)
+
+def _clean_collection_name(name):
+    """Entfernt ungültige Zeichen (erlaubt: alphanumerisch/._-, Anfang/Ende alphanumerisch)."""
+    name = ''.join(c for c in name if c.isalnum() or c in '._-')
+    # Folgen von "_" bzw. "-" zusammenfassen (auch solche, die erst durch das Filtern entstehen)
+    name = re.sub('_+', '_', re.sub('-+', '-', name))
+    return name.lstrip('._-').rstrip('._-')
+
+def build_collection_name(tenant_id, scope, user_id):
+    """
+    Erstellt einen gültigen Collection-Namen für ChromaDB (3-512 chars, alphanumeric/._-,
+    must start/end with alphanumeric).
+    
+    Returns:
+        str: Name im Format "{tenant_id}_{scope}_{user_id}"
+    """
+    # Entferne leading underscores und trailing hyphens/underscores
+    clean_tenant_id = tenant_id.rstrip('-_').lstrip('_')
+    clean_user_id = user_id.rstrip('-_').lstrip('_')
+    return _clean_collection_name(f"{clean_tenant_id}_{scope}_{clean_user_id}")
+
+def tenant_prefix(tenant_id):
+    """
+    Gibt das Präfix zurück, mit dem alle Collection-Namen eines Mandanten
+    (aus build_collection_name()) beginnen.
+    
+    Das Präfix ist nicht eindeutig ("acme" ist auch Präfix von "acme_corp"),
+    Aufrufer müssen zusätzlich nach `tenant_id` filtern.
+    """
+    return _clean_collection_name(tenant_id.rstrip('-_').lstrip('_'))
@@ -0,0 +1,301 @@
+"""
+Embedding-Kompression Modul
+===========================
+Optionaler komprimierter Speichermodus für Embeddings.
+
+ChromaDB speichert Vektoren im HNSW-Index immer als float32. Der Speicher
+wird deshalb auf zwei Wegen reduziert:
+
+- Dimensions-Kürzung (Matryoshka, EMBEDDING_INDEX_DIMENSIONS): In den Index
+  kommen nur die ersten N Dimensionen (L2-normalisiert).
+- Komprimierte Vollkopie (EMBEDDING_STORAGE_MODE = "float16" | "int8"): Der
+  vollständige Vektor wird quantisiert als Base64-String in einer
+  Begleit-Collection `{name}__embedding_q` abgelegt (gleiche IDs, außerhalb
+  des Index und der Chunk-Metadaten). Bei einer Suche werden die
+  Top-Kandidaten aus dem gekürzten Index damit neu bewertet. Ohne Kürzung
+  liegt der volle Vektor bereits im Index, der Modus hat dann keine Wirkung.
+
+int8 wird pro Vektor skaliert (maximaler Absolutwert, als float32 vor den
+int8-Werten gespeichert). Damit wird nie abgeschnitten und es ist keine
+Kalibrierung pro Collection nötig. Die Einstellungen werden beim ersten
+Upload in einer leeren Collection festgeschrieben; bestehende Collections
+bleiben unverändert.
+
+Funktionen:
+- add_chunks(): Ersetzt `col.add()`, inklusive Kürzung und Vollkopie
+- delete_chunks(): Ersetzt `col.delete()`, löscht auch die Vollkopien
+- search(): Ersetzt `col.query()`, inklusive Kürzung und Re-Scoring
+- is_copies_collection(): Erkennt Begleit-Collections am Metadaten-Flag (z.B. für Listen)
+"""
+
+import base64
+import threading
+
+import numpy as np
+
+from .config import get_settings
+from .chroma_client import get_client
+
+# Namenszusatz der Begleit-Collection mit den komprimierten Vollkopien. Erkannt
+# werden Begleit-Collections nur am Metadaten-Flag COPIES_KEY, nie am Namen.
+COPIES_SUFFIX = "__embedding_q"
+
+# Schlüssel in den Collection-Metadaten
+DIMENSIONS_KEY = "embedding_dimensions"
+STORAGE_MODE_KEY = "embedding_storage_mode"
+COPIES_KEY = "embedding_copies_of"  # Name der Collection, deren Vollkopien hier liegen
+
+STORAGE_MODES = ("float32", "float16", "int8")
+
+
+def truncate(embeddings, dimensions):
+    """
+    Kürzt Embeddings auf die ersten `dimensions` Dimensionen und normalisiert neu.
+
+    Args:
+        embeddings (array-like): Matrix (n x d) der Embeddings
+        dimensions (int | None): Zieldimension, None/0 für keine Kürzung
+
+    Returns:
+        np.ndarray: float32 Matrix (n x dimensions)
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if not dimensions or dimensions >= matrix.shape[1]:
+        return matrix
+    truncated = matrix[:, :dimensions]
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    return truncated / np.maximum(norms, 1e-12)
+
+
+def quantize(embeddings, mode):
+    """
+    Quantisiert Embeddings in das Speicherformat.
+
+    Args:
+        embeddings (array-like): Matrix (n x d)
+        mode (str): "float16" oder "int8"
+
+    Returns:
+        tuple: (float16 bzw. int8 Matrix, float32 Skala pro Zeile (n x 1) oder None für float16)
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if mode == "float16":
+        return matrix.astype(np.float16), None
+    scales = np.maximum(np.abs(matrix).max(axis=1, keepdims=True), 1e-12).astype(np.float32)
+    return np.rint(matrix / scales * 127).astype(np.int8), scales
+
+
+def dequantize(quantized, mode, scales=None):
+    """Wandelt quantisierte Embeddings zurück in float32."""
+    if mode == "float16":
+        return quantized.astype(np.float32)
+    return quantized.astype(np.float32) * scales / 127
+
+
+def encode_copies(embeddings, mode):
+    """Quantisiert Embeddings und kodiert jede Zeile als Base64-String (int8: Skala + Werte)."""
+    quantized, scales = quantize(embeddings, mode)
+    if mode == "float16":
+        return [base64.b64encode(row.tobytes()).decode("ascii") for row in quantized]
+    return [
+        base64.b64encode(scale.tobytes() + row.tobytes()).decode("ascii")
+        for scale, row in zip(scales, quantized)
+    ]
+
+
+def decode_copy(value, mode):
+    """Dekodiert eine Vollkopie aus encode_copies() in einen float32 Vektor."""
+    raw = base64.b64decode(value)
+    if mode == "float16":
+        return dequantize(np.frombuffer(raw, dtype=np.float16), mode)
+    scale = np.frombuffer(raw[:4], dtype=np.float32)
+    return dequantize(np.frombuffer(raw[4:], dtype=np.int8), mode, scale)
+
+
+def _collection_config(metadata):
+    """Liest die festgeschriebene Kompressions-Konfiguration aus Collection-Metadaten."""
+    metadata = metadata or {}
+    return metadata.get(DIMENSIONS_KEY) or None, metadata.get(STORAGE_MODE_KEY, "float32")
+
+
+def is_copies_collection(col):
+    """Gibt True zurück, falls `col` eine Begleit-Collection mit Vollkopien ist."""
+    return bool((col.metadata or {}).get(COPIES_KEY))
+
+
+def _copies_collection(col):
+    return get_client().get_or_create_collection(col.name + COPIES_SUFFIX, metadata={COPIES_KEY: col.name})
+
+
+def _check_not_copies(col):
+    if is_copies_collection(col):
+        raise ValueError(f"Collection '{col.name}' ist eine Begleit-Collection und kann nicht direkt verwendet werden")
+
+
+_init_locks = {}
+_init_locks_lock = threading.Lock()
+
+
+def _init_lock(name):
+    with _init_locks_lock:
+        return _init_locks.setdefault(name, threading.Lock())
+
+
+def _initialize_collection(col):
+    """
+    Schreibt die aktuelle Konfiguration in die Metadaten einer leeren Collection.
+
+    Returns:
+        dict: Die neuen Collection-Metadaten
+    """
+    settings = get_settings()
+    mode = settings.embedding_storage_mode
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Ungültiger EMBEDDING_STORAGE_MODE '{mode}'. Erlaubt sind: {', '.join(STORAGE_MODES)}")
+
+    # hnsw:* Einstellungen dürfen nach dem Erstellen nicht geändert werden
+    metadata = {k: v for k, v in (col.metadata or {}).items() if not k.startswith("hnsw:")}
+    metadata[STORAGE_MODE_KEY] = mode
+    metadata[DIMENSIONS_KEY] = settings.embedding_index_dimensions
+    col.modify(metadata=metadata)
+    return metadata
+
+
+def _storage_config(col):
+    """
+    Gibt die Kompressions-Konfiguration einer Collection zurück und schreibt
+    sie bei der ersten Befüllung einer leeren Collection fest.
+
+    Die Initialisierung ist pro Collection serialisiert; nach dem Lock werden
+    die Metadaten neu gelesen, da ein paralleler Upload sie bereits
+    festgeschrieben haben kann. Parallele Uploads in anderen Prozessen
+    schreiben bei gleicher Konfiguration dieselben Werte.
+    """
+    metadata = col.metadata or {}
+    if get_settings().embedding_index_dimensions and STORAGE_MODE_KEY not in metadata:
+        with _init_lock(col.name):
+            metadata = get_client().get_collection(col.name).metadata or {}
+            if STORAGE_MODE_KEY not in metadata and col.count() == 0:
+                metadata = _initialize_collection(col)
+    return _collection_config(metadata)
+
+
+def add_chunks(col, ids, embeddings, documents, metadatas):
+    """
+    Fügt Chunks wie `col.add()` hinzu und legt sie im Format der Collection ab.
+
+    Bei gekürztem Index kommen die gekürzten Embeddings in die Collection und
+    (für float16/int8) die quantisierte Vollkopie in die Begleit-Collection.
+
+    Args:
+        col (chromadb.Collection): Ziel-Collection
+        ids (list): Chunk-IDs
+        embeddings (list): Volle Embeddings von embed_text()/embed_texts()
+        documents (list): Chunk-Texte
+        metadatas (list): Chunk-Metadaten (`file_id` wird für das Löschen übernommen)
+    """
+    _check_not_copies(col)
+    dimensions, mode = _storage_config(col)
+    if not dimensions:
+        col.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+        return
+
+    index_embeddings = truncate(embeddings, dimensions).tolist()
+    if mode == "float32":
+        col.add(ids=ids, embeddings=index_embeddings, documents=documents, metadatas=metadatas)
+        return
+
+    # Vollkopien zuerst schreiben: schlägt das Hinzufügen der Chunks fehl, werden sie wieder entfernt
+    copies = _copies_collection(col)
+    copies.add(
+        ids=ids,
+        embeddings=[[1.0] for _ in ids],  # Platzhalter, die Begleit-Collection wird nie durchsucht
+        documents=encode_copies(embeddings, mode),
+        metadatas=[{"file_id": (m or {}).get("file_id", "")} for m in metadatas]
+    )
+    try:
+        col.add(ids=ids, embeddings=index_embeddings, documents=documents, metadatas=metadatas)
+    except Exception:
+        copies.delete(ids=ids)
+        raise
+
+
+def delete_chunks(col, ids=None, where=None):
+    """Löscht Chunks wie `col.delete()`, inklusive ihrer Vollkopien."""
+    col.delete(ids=ids, where=where)
+    dimensions, mode = _collection_config(col.metadata)
+    if dimensions and mode != "float32":
+        _copies_collection(col).delete(ids=ids, where=where)
+
+
+def _distance(space, queries, candidates):
+    """Berechnet Distanzen passend zum Distanzmaß der Collection (hnsw:space)."""
+    if space == "l2":
+        return ((candidates - queries) ** 2).sum(axis=-1)
+    if space == "ip":
+        return 1 - (candidates * queries).sum(axis=-1)
+    # cosine
+    norms = np.linalg.norm(candidates, axis=-1) * np.linalg.norm(queries, axis=-1)
+    return 1 - (candidates * queries).sum(axis=-1) / np.maximum(norms, 1e-12)
+
+
+def search(col, query_embeddings, n_results, where=None, include=None):
+    """
+    Führt `col.query()` unter Berücksichtigung der Kompression der Collection aus.
+
+    Ist die Collection gekürzt, wird mit gekürzten Query-Embeddings gesucht.
+    Sind komprimierte Vollkopien vorhanden, werden RESCORE_CANDIDATES
+    Kandidaten abgefragt und mit den vollen Query-Embeddings neu bewertet.
+
+    Args:
+        col (chromadb.Collection): Die Collection
+        query_embeddings (list): Volle Query-Embeddings
+        n_results (int): Anzahl Treffer pro Query
+        where (dict | None): ChromaDB Metadaten-Filter
+        include (list | None): Felder für `col.query()`
+
+    Returns:
+        dict: Ergebnis im ChromaDB-Format
+    """
+    _check_not_copies(col)
+    include = list(include or ["documents", "metadatas", "distances"])
+    dimensions, mode = _collection_config(col.metadata)
+    if not dimensions:
+        return col.query(query_embeddings=query_embeddings, n_results=n_results, where=where, include=include)
+
+    index_queries = truncate(query_embeddings, dimensions).tolist()
+    if mode == "float32":
+        return col.query(query_embeddings=index_queries, n_results=n_results, where=where, include=include)
+
+    fetch_n = max(n_results, get_settings().rescore_candidates)
+    query_include = include if "distances" in include else include + ["distances"]
+    results = col.query(query_embeddings=index_queries, n_results=fetch_n, where=where, include=query_include)
+
+    candidate_ids = list({chunk_id for q_ids in results["ids"] for chunk_id in q_ids})
+    stored = {}
+    if candidate_ids:
+        page = _copies_collection(col).get(ids=candidate_ids, include=["documents"])
+        stored = dict(zip(page["ids"], page["documents"]))
+
+    space = (col.metadata or {}).get("hnsw:space", "l2")
+    full_queries = np.asarray(query_embeddings, dtype=np.float32)
+    per_query = [k for k, v in results.items() if isinstance(v, list) and v and isinstance(v[0], list)]
+    rescored = dict(results)
+    for key in per_query:
+        rescored[key] = []
+
+    for q_index, q_ids in enumerate(results["ids"]):
+        distances = list(results["distances"][q_index])
+        for i, chunk_id in enumerate(q_ids):
+            if stored.get(chunk_id):
+                full = decode_copy(stored[chunk_id], mode)
+                distances[i] = float(_distance(space, full_queries[q_index], full))
+        order = sorted(range(len(distances)), key=lambda i: distances[i])[:n_results]
+        for key in per_query:
+            values = distances if key == "distances" else results[key][q_index]
+            rescored[key].append([values[i] for i in order])
+
+    # Nur die angeforderten Felder zurückgeben
+    if "distances" not in include:
+        rescored["distances"] = None
+    return rescored
@@ -2,6 +2,8 @@
 Konfigurationsmodul für TenantRAG
 =====================================
 Lädt Umgebungsvariablen aus .env Datei und stellt sie als Settings-Objekt bereit.
+Das Settings-Objekt wird erst beim ersten Aufruf von get_settings() erstellt,
+damit der Import der Anwendung ohne vollständige Umgebung möglich ist.
 
 Benötigte Umgebungsvariablen:
 - IONOS_API_KEY: API-Schlüssel für IONOS AI Embeddings
@@ -12,8 +14,32 @@ Benötigte Umgebungsvariablen:
 - DATABASE_URL: Verbindungsstring für MySQL/MariaDB
 - WEBUI_USERNAME: Benutzername für Streamlit Dashboard (optional)
 - WEBUI_PASSWORD: Passwort für Streamlit Dashboard (optional)
+- QUERY_DEFAULT_N_RESULTS: Standardanzahl Treffer pro Query (optional, Default 5)
+- QUERY_MAX_N_RESULTS: Maximal erlaubte Trefferanzahl pro Query (optional, Default 100)
+- QUERY_BATCH_MAX_QUESTIONS: Maximale Anzahl Fragen pro /query/batch Request (optional, Default 500)
+- QUERY_EMBEDDING_CACHE_SIZE: Anzahl gecachter Embeddings von Suchfragen (optional, Default 1024)
+- COLLECTION_MAX_PAGE_SIZE: Maximale Seitengröße der /collections Endpoints (optional, Default 500)
+- EMBEDDING_BATCH_SIZE: Maximale Anzahl Texte pro Embedding-API-Aufruf (optional, Default 64)
+- EMBEDDING_STORAGE_MODE: "float32", "float16" oder "int8" für die komprimierte Vollkopie (optional, Default float32)
+- EMBEDDING_INDEX_DIMENSIONS: Matryoshka-Kürzung der Index-Vektoren, 0 = volle Dimension (optional)
+- RESCORE_CANDIDATES: Kandidaten für das Re-Scoring mit der Vollkopie (optional, Default 50)
+- RERANKER: Re-Ranker für rerank=true, "lexical" oder "cross-encoder" (optional, Default lexical)
+- RERANKER_MODEL: Cross-Encoder Modell (optional, benötigt sentence-transformers)
+- RERANKER_BATCH_SIZE / RERANKER_MAX_WORKERS: Batchgröße und Threads für den Cross-Encoder (optional)
+- RERANK_CANDIDATES: Größe des Kandidaten-Pools für Re-Ranking (optional, Default 25)
+- RERANK_BUDGET_MS: Latenzbudget pro Request, danach wird Re-Ranking übersprungen (optional, Default 300)
+- TENANT_UPLOAD_RATE / TENANT_UPLOAD_BURST: Token-Bucket für /upload pro Mandant (Requests/s, optional, 0 = aus)
+- TENANT_QUERY_RATE / TENANT_QUERY_BURST: Token-Bucket für /query pro Mandant (Fragen/s, optional, 0 = aus)
+- TENANT_MAX_CHUNKS / TENANT_MAX_BYTES: Speicher-Quota pro Mandant (optional, 0 = unbegrenzt)
+- TENANT_LIMITS: JSON mit Overrides pro Mandant, z.B. {"acme": {"query_rate": 50}} (optional)
+- EMBEDDING_MAX_CONCURRENCY: Gleichzeitige Embedding-Aufrufe beim Provider (optional, Default 4)
+- EMBEDDING_WEIGHT_INTERACTIVE / EMBEDDING_WEIGHT_BULK: Gewichte für Queries bzw. Uploads (optional, Default 4 / 1)
+- WARMUP_ON_STARTUP: Clients beim Start im Hintergrund vorwärmen (optional, Default true)
+- READINESS_TIMEOUT_S: Timeout pro Abhängigkeit für /ready (optional, Default 2.0)
 """
 
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -23,6 +49,7 @@ class Settings(BaseSettings):
     ionos_api_key: str
     ionos_ai_base_url: str = "https://openai.inference.de-txl.ionos.com/v1"
     ionos_model: str = "BAAI/bge-m3"
+    embedding_batch_size: int = 64
     
     # ChromaDB Vektordatenbank
     chroma_url: str
@@ -30,6 +57,44 @@ class Settings(BaseSettings):
     chroma_auth_token: str
     chroma_auth_token_transport_header: str = "X-Token"
     
+    # Query-Parameter (Defaults und Obergrenzen für /query)
+    query_default_n_results: int = 5
+    query_max_n_results: int = 100
+    query_batch_max_questions: int = 500
+    query_embedding_cache_size: int = 1024
+    collection_max_page_size: int = 500
+
+    # Embedding-Kompression ("float32", "float16" oder "int8"; 0 Dimensionen = keine Kürzung)
+    embedding_storage_mode: str = "float32"
+    embedding_index_dimensions: int = 0
+    rescore_candidates: int = 50
+
+    # Re-Ranking ("lexical" oder "cross-encoder")
+    reranker: str = "lexical"
+    reranker_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    reranker_batch_size: int = 16
+    reranker_max_workers: int = 2
+    rerank_candidates: int = 25
+    rerank_budget_ms: int = 300
+
+    # Mandanten-Limits (0 = unbegrenzt), Overrides pro Mandant über TENANT_LIMITS (JSON)
+    tenant_upload_rate: float = 0
+    tenant_upload_burst: float = 10
+    tenant_query_rate: float = 0
+    tenant_query_burst: float = 50
+    tenant_max_chunks: int = 0
+    tenant_max_bytes: int = 0
+    tenant_limits: dict[str, dict[str, float]] = {}
+
+    # Embedding-Kapazität beim Provider (Weighted Fair Scheduling)
+    embedding_max_concurrency: int = 4
+    embedding_weight_interactive: float = 4.0
+    embedding_weight_bulk: float = 1.0
+
+    # Start und Readiness
+    warmup_on_startup: bool = True
+    readiness_timeout_s: float = 2.0
+
     # Relationale Datenbank (optional - nur wenn SQLAlchemy benötigt)
     database_url: str = "sqlite:///./test.db"
     
@@ -39,4 +104,18 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env")
 
-settings = Settings()
+@lru_cache
+def get_settings():
+    """
+    Gibt das Settings-Objekt zurück und erstellt es beim ersten Aufruf.
+    
+    Returns:
+        Settings: Die Anwendungskonfiguration
+    """
+    return Settings()
+
+def __getattr__(name):
+    # Kompatibilität: `from app.config import settings` funktioniert weiterhin (lazy)
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
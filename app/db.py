@@ -1,7 +1,15 @@
+from functools import lru_cache
+
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-from .config import settings
+from .config import get_settings
+
+@lru_cache
+def get_engine():
+    # Engine erst bei der ersten Verwendung erstellen (lazy)
+    return create_async_engine(get_settings().database_url, echo=True)
 
-engine = create_async_engine(settings.database_url, echo=True)
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+@lru_cache
+def get_sessionmaker():
+    return sessionmaker(get_engine(), class_=AsyncSession, expire_on_commit=False)
@@ -5,22 +5,35 @@ Konvertiert Texte in numerische Vektoren mittels IONOS AI Embeddings API.
 Diese Vektoren werden verwendet für semantische Suche in ChromaDB.
 
 Die Verwendung: embed_text() -> gibt Float-Array zurück
+               embed_texts() -> gibt eine Liste von Float-Arrays zurück (Batch)
+               embed_query() -> wie embed_text(), aber mit LRU-Cache für Suchfragen
 """
 
 import os
-from .config import settings
-from openai import OpenAI
+from functools import lru_cache
 
-# IONOS AI Konfiguration
-IONOS_API_TOKEN = os.getenv("IONOS_API_KEY", settings.ionos_api_key)
-IONOS_API_BASE_URL = os.getenv("IONOS_AI_BASE_URL", settings.ionos_ai_base_url)
-IONOS_MODEL = os.getenv("IONOS_MODEL", settings.ionos_model)
+from .config import get_settings
 
-# OpenAI-kompatibler Client für IONOS AI
-openai = OpenAI(
-    api_key=IONOS_API_TOKEN,
-    base_url=IONOS_API_BASE_URL
-)
+def get_model():
+    """Gibt den Namen des Embedding-Modells zurück (Umgebungsvariable hat Vorrang)."""
+    return os.getenv("IONOS_MODEL", get_settings().ionos_model)
+
+@lru_cache
+def get_client():
+    """
+    Erstellt den OpenAI-kompatiblen Client für IONOS AI (beim ersten Aufruf).
+    
+    Returns:
+        openai.OpenAI: Der Client
+    """
+    # Schwerer Import, erst bei Bedarf laden
+    from openai import OpenAI
+    
+    settings = get_settings()
+    return OpenAI(
+        api_key=os.getenv("IONOS_API_KEY", settings.ionos_api_key),
+        base_url=os.getenv("IONOS_AI_BASE_URL", settings.ionos_ai_base_url)
+    )
 
 def embed_text(text):
     """
@@ -36,11 +49,66 @@ def embed_text(text):
         RuntimeError: Falls die IONOS API nicht erreichbar ist oder einen Fehler zurückgibt
     """
     try:
-        embedding = openai.embeddings.create(
+        embedding = get_client().embeddings.create(
             input=[text],
-            model=IONOS_MODEL,
+            model=get_model(),
             encoding_format='float'
         )
         return embedding.data[0].embedding
     except Exception as e:
         raise RuntimeError(f"IONOS AI API Fehler: {e}")
+
+
+def embed_texts(texts, batch_size=None):
+    """
+    Konvertiert mehrere Texte mit möglichst wenigen API-Aufrufen in Embeddings.
+    
+    Die Texte werden in Blöcken von `batch_size` an die IONOS API gesendet.
+    
+    Args:
+        texts (list): Die Texte, die embedded werden sollen
+        batch_size (int): Maximale Anzahl Texte pro API-Aufruf
+                          (Default: settings.embedding_batch_size)
+    
+    Returns:
+        list: Liste von Float-Arrays, in derselben Reihenfolge wie `texts`
+    
+    Raises:
+        RuntimeError: Falls die IONOS API nicht erreichbar ist oder einen Fehler zurückgibt
+    """
+    batch_size = batch_size or get_settings().embedding_batch_size
+    embeddings = []
+    try:
+        client = get_client()
+        model = get_model()
+        for start in range(0, len(texts), batch_size):
+            response = client.embeddings.create(
+                input=texts[start:start + batch_size],
+                model=model,
+                encoding_format='float'
+            )
+            # Die API garantiert keine Reihenfolge, daher nach Index sortieren
+            embeddings.extend(d.embedding for d in sorted(response.data, key=lambda d: d.index))
+        return embeddings
+    except Exception as e:
+        raise RuntimeError(f"IONOS AI API Fehler: {e}")
+
+
+_query_cache = None
+
+def embed_query(text):
+    """
+    Wie embed_text(), aber für Suchfragen mit einem LRU-Cache
+    (Größe: settings.query_embedding_cache_size). Wiederholte Suchen, z.B.
+    aus dem Dashboard, sparen so den Aufruf der IONOS API.
+    
+    Args:
+        text (str): Die Suchfrage
+    
+    Returns:
+        list: Float-Array (nicht verändern, wird aus dem Cache geteilt)
+    """
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = lru_cache(maxsize=get_settings().query_embedding_cache_size)(embed_text)
+    return _query_cache(text)
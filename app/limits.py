@@ -0,0 +1,240 @@
+"""
+Limits Modul
+============
+Admission Control pro Mandant (tenant_id):
+
+- Rate Limiting: Token-Bucket pro Mandant und Endpoint-Art ("upload", "query")
+- Speicher-Quotas: Maximale Anzahl Chunks und Bytes pro Mandant
+
+Die Zähler werden im Speicher des jeweiligen Prozesses gehalten. Die
+Speicher-Belegung eines Mandanten wird beim ersten Zugriff aus den
+Upload-Metadaten in ChromaDB (`tenant_id`, `chunk_bytes`) ermittelt und danach
+bei jedem Upload fortgeschrieben.
+
+Limits können pro Mandant über TENANT_LIMITS (JSON) überschrieben werden, z.B.
+{"acme_corp": {"query_rate": 50, "max_chunks": 100000}}.
+
+Funktionen:
+- check_rate_limit(): Prüft und verbraucht Tokens, gibt die Wartezeit zurück
+- check_rate_limits(): Wie check_rate_limit(), für mehrere Mandanten (alles oder nichts)
+- reserve_storage() / release_storage(): Reservieren und Freigeben von Speicher-Quota
+- invalidate_usage(): Verwirft die gecachte Belegung eines Mandanten (z.B. nach dem Löschen)
+- clear_usage(): Verwirft die gecachte Belegung aller Mandanten
+"""
+
+import time
+import threading
+
+from .config import get_settings
+from .chroma_client import get_client, tenant_prefix
+from .compression import is_copies_collection
+
+
+class QuotaExceededError(Exception):
+    """Wird ausgelöst, wenn ein Upload die Speicher-Quota eines Mandanten überschreitet."""
+
+
+class TokenBucket:
+    """
+    Klassischer Token-Bucket: `rate` Tokens pro Sekunde, maximal `capacity` Tokens.
+
+    Nicht thread-sicher, alle Zugriffe erfolgen unter `_buckets_lock`.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, cost=1):
+        """
+        Füllt den Bucket auf und prüft, ob `cost` Tokens verfügbar sind (ohne sie zu verbrauchen).
+
+        Args:
+            cost (float): Anzahl Tokens
+
+        Returns:
+            float: 0 falls verfügbar, sonst Sekunden bis genügend Tokens verfügbar sind
+
+        Raises:
+            ValueError: Falls `cost` die Kapazität übersteigt und nie erfüllt werden kann
+        """
+        if cost > self.capacity:
+            raise ValueError(f"Anfrage benötigt {cost} Tokens, der Burst erlaubt höchstens {self.capacity}")
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def consume(self, cost=1):
+        """Verbraucht `cost` Tokens (nach erfolgreichem wait_time())."""
+        self.tokens -= cost
+
+
+def _limit(tenant_id, name):
+    """Gibt ein Limit für einen Mandanten zurück (Override aus TENANT_LIMITS oder Default)."""
+    settings = get_settings()
+    overrides = settings.tenant_limits.get(tenant_id, {})
+    return overrides.get(name, getattr(settings, f"tenant_{name}"))
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def check_rate_limits(costs, kind):
+    """
+    Prüft die Rate Limits mehrerer Mandanten und verbraucht die Tokens nur,
+    wenn alle Mandanten genügend Tokens haben (alles oder nichts).
+
+    Args:
+        costs (dict): Anzahl Tokens pro Mandanten-ID (z.B. Anzahl Fragen bei /query/batch)
+        kind (str): "upload" oder "query"
+
+    Returns:
+        tuple: (None, 0) falls erlaubt, sonst (abgelehnte Mandanten-ID, Sekunden bis zum nächsten möglichen Request)
+
+    Raises:
+        ValueError: Falls die Kosten eines Mandanten seinen Burst übersteigen
+    """
+    with _buckets_lock:
+        charged = []
+        for tenant_id, cost in costs.items():
+            rate = _limit(tenant_id, f"{kind}_rate")
+            if not rate:
+                continue  # 0 = unbegrenzt
+            key = (tenant_id, kind)
+            bucket = _buckets.get(key)
+            if bucket is None:
+                bucket = _buckets[key] = TokenBucket(rate, _limit(tenant_id, f"{kind}_burst"))
+            try:
+                retry_after = bucket.wait_time(cost)
+            except ValueError as e:
+                raise ValueError(f"Mandant '{tenant_id}': {e} ({kind}_burst)") from None
+            if retry_after:
+                return tenant_id, retry_after
+            charged.append((bucket, cost))
+        for bucket, cost in charged:
+            bucket.consume(cost)
+    return None, 0.0
+
+
+def check_rate_limit(tenant_id, kind, cost=1):
+    """
+    Prüft das Rate Limit eines Mandanten für eine Endpoint-Art.
+
+    Args:
+        tenant_id (str): Mandanten-ID
+        kind (str): "upload" oder "query"
+        cost (float): Anzahl verbrauchter Tokens
+
+    Returns:
+        float: 0 falls erlaubt, sonst Sekunden bis zum nächsten möglichen Request
+    """
+    return check_rate_limits({tenant_id: cost}, kind)[1]
+
+
+_usage = {}
+_usage_lock = threading.Lock()
+
+
+def _scan_usage(tenant_id):
+    """
+    Ermittelt Chunks und Bytes eines Mandanten aus den Upload-Metadaten in ChromaDB.
+
+    Durchsucht nur Collections, deren Name mit dem Mandanten-Präfix beginnt.
+    Für Chunks ohne `chunk_bytes` (vor Einführung der Quotas hochgeladen) wird
+    die Länge des Dokument-Texts verwendet.
+    """
+    client = get_client()
+    page_size = get_settings().collection_max_page_size
+    prefix = tenant_prefix(tenant_id)
+    chunks = 0
+    size = 0
+    for collection in client.list_collections():
+        name = collection if isinstance(collection, str) else collection.name
+        if not name.startswith(prefix):
+            continue
+        col = client.get_collection(name)
+        if is_copies_collection(col):
+            continue
+        offset = 0
+        while True:
+            page = col.get(where={"tenant_id": tenant_id}, offset=offset, limit=page_size, include=["metadatas"])
+            missing = []
+            for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+                chunks += 1
+                if (metadata or {}).get("chunk_bytes") is None:
+                    missing.append(chunk_id)
+                else:
+                    size += metadata["chunk_bytes"]
+            if missing:
+                documents = col.get(ids=missing, include=["documents"])["documents"]
+                size += sum(len((doc or "").encode("utf-8")) for doc in documents)
+            if len(page["ids"]) < page_size:
+                break
+            offset += page_size
+    return {"chunks": chunks, "bytes": size}
+
+
+def reserve_storage(tenant_id, chunks, size):
+    """
+    Reserviert Speicher-Quota für einen Upload.
+
+    Args:
+        tenant_id (str): Mandanten-ID
+        chunks (int): Anzahl neuer Chunks
+        size (int): Bytes der neuen Chunks (UTF-8)
+
+    Raises:
+        QuotaExceededError: Falls die Quota überschritten würde
+    """
+    max_chunks = _limit(tenant_id, "max_chunks")
+    max_bytes = _limit(tenant_id, "max_bytes")
+    if not max_chunks and not max_bytes:
+        return  # Keine Quota konfiguriert
+
+    scanned = None
+    while True:
+        with _usage_lock:
+            usage = _usage.get(tenant_id)
+            if usage is None and scanned is not None:
+                usage = _usage[tenant_id] = scanned
+            if usage is not None:
+                if max_chunks and usage["chunks"] + chunks > max_chunks:
+                    raise QuotaExceededError(
+                        f"Chunk-Quota überschritten: {usage['chunks']} + {chunks} > {max_chunks}"
+                    )
+                if max_bytes and usage["bytes"] + size > max_bytes:
+                    raise QuotaExceededError(
+                        f"Speicher-Quota überschritten: {usage['bytes']} + {size} > {max_bytes} Bytes"
+                    )
+                usage["chunks"] += chunks
+                usage["bytes"] += size
+                return
+        # Belegung unbekannt (erster Upload oder invalidiert): ohne Lock neu ermitteln
+        scanned = _scan_usage(tenant_id)
+
+
+def release_storage(tenant_id, chunks, size):
+    """Gibt eine Reservierung wieder frei (z.B. wenn der Upload fehlschlägt)."""
+    with _usage_lock:
+        usage = _usage.get(tenant_id)
+        if usage is not None:
+            usage["chunks"] -= chunks
+            usage["bytes"] -= size
+
+
+def invalidate_usage(tenant_id):
+    """Verwirft die gecachte Belegung eines Mandanten; sie wird beim nächsten Upload neu ermittelt."""
+    with _usage_lock:
+        _usage.pop(tenant_id, None)
+
+
+def clear_usage():
+    """Verwirft die gecachte Belegung aller Mandanten (jeder Mandant wird beim nächsten Upload neu gescannt)."""
+    with _usage_lock:
+        _usage.clear()
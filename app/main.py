@@ -1,27 +1,149 @@
-from fastapi import FastAPI, UploadFile, Form
+from fastapi import FastAPI, UploadFile, Form, APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
 import uuid
+import secrets
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-from .schemas import UploadDoc
-from .embeddings import embed_text
-from .chroma_client import get_collection
+from .schemas import UploadDoc, BatchQuery, BatchQuestion
+from .embeddings import embed_query, embed_texts, get_client as get_embedding_client
+from .chroma_client import get_collection, build_collection_name, get_client as get_chroma_client
+from .config import get_settings
+from .retrieval import parse_include, build_where_filter, shape_results
+from .reranker import get_reranker, rerank_results, shutdown_executor
+from .limits import check_rate_limit, check_rate_limits, reserve_storage, release_storage, invalidate_usage, QuotaExceededError
+from .scheduler import run_embedding, INTERACTIVE, BULK
+from .compression import add_chunks, delete_chunks, search, is_copies_collection
 
 
 import os
 from pathlib import Path
-from pdfminer.high_level import extract_text
 
 BASE_DIR = Path(__file__).resolve().parent
 
-app = FastAPI(title="TenantRAG API", description="Multi-Tenant RAG System")
+logger = logging.getLogger(__name__)
+
+def _import_pdfminer():
+    import pdfminer.high_level  # noqa: F401
+
+def _load_reranker():
+    # Nur der Cross-Encoder hat ein Modell, das mehrere Sekunden zum Laden braucht
+    if get_settings().reranker == "cross-encoder":
+        get_reranker().load()
+
+# Warm-up Hooks: werden beim Start im Hintergrund ausgeführt, damit der erste
+# Request nicht die Client-Erstellung und schwere Imports bezahlt
+WARMUP_HOOKS = [
+    ("chroma", get_chroma_client),
+    ("embeddings", get_embedding_client),
+    ("pdfminer", _import_pdfminer),
+    ("reranker", _load_reranker),
+]
+
+def rate_limited_response(tenant_id, retry_after):
+    """Antwort für überschrittene Rate Limits (HTTP 429 mit Retry-After Header)."""
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(max(1, round(retry_after)))},
+        content={"error": f"Rate Limit für Mandant '{tenant_id}' überschritten. Bitte in {retry_after:.1f}s erneut versuchen.", "success": False}
+    )
+
+async def embed_in_batches(texts, priority):
+    """
+    Embedded Texte in Blöcken von EMBEDDING_BATCH_SIZE über den Fair Scheduler.
+    Die Blöcke laufen nebenläufig, soweit der Scheduler Slots vergibt.
+    
+    Returns:
+        list: Embeddings in derselben Reihenfolge wie `texts`
+    """
+    batch_size = get_settings().embedding_batch_size
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    results = await asyncio.gather(
+        *(run_embedding(priority, len(batch), embed_texts, batch) for batch in batches)
+    )
+    return [emb for batch in results for emb in batch]
+
+def warm_up():
+    """
+    Führt alle Warm-up Hooks aus. Fehler werden nur geloggt, damit die
+    Anwendung auch startet, wenn eine Abhängigkeit kurzzeitig nicht erreichbar ist.
+    """
+    for name, hook in WARMUP_HOOKS:
+        try:
+            hook()
+        except Exception as e:
+            logger.warning("Warm-up '%s' fehlgeschlagen: %s", name, e)
+
+@asynccontextmanager
+async def lifespan(app):
+    """Startet das Warm-up im Hintergrund und gibt Ressourcen beim Herunterfahren frei."""
+    warmup_task = None
+    try:
+        if get_settings().warmup_on_startup:
+            warmup_task = asyncio.create_task(asyncio.to_thread(warm_up))
+    except Exception as e:
+        logger.warning("Warm-up übersprungen: %s", e)
+    
+    yield
+    
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    shutdown_executor()
+    
+    # Engine nur freigeben, wenn sie tatsächlich erstellt wurde
+    from .db import get_engine
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
+
+app = FastAPI(title="TenantRAG API", description="Multi-Tenant RAG System", lifespan=lifespan)
 
 @app.get("/health")
 async def health():
     """Health Check Endpoint"""
     return {"status": "healthy", "version": "1.0.0", "timestamp": datetime.now().isoformat()}
 
+async def _check_dependency(check, timeout):
+    """Führt einen blockierenden Readiness-Check im Thread aus und gibt den Status zurück."""
+    try:
+        await asyncio.wait_for(asyncio.to_thread(check), timeout=timeout)
+        return "ok"
+    except asyncio.TimeoutError:
+        return f"error: Timeout nach {timeout}s"
+    except Exception as e:
+        return f"error: {e}"
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness Endpoint: Prüft im Gegensatz zu /health die Erreichbarkeit von
+    ChromaDB und der IONOS AI API. Gibt 503 zurück, falls eine Abhängigkeit fehlt.
+    """
+    try:
+        timeout = get_settings().readiness_timeout_s
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not ready", "checks": {"config": f"error: {e}"}}
+        )
+    
+    names = ["chroma", "embeddings"]
+    results = await asyncio.gather(
+        _check_dependency(lambda: get_chroma_client().heartbeat(), timeout),
+        _check_dependency(lambda: get_embedding_client().models.list(), timeout),
+    )
+    checks = dict(zip(names, results))
+    is_ready = all(status == "ok" for status in results)
+    
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "not ready", "checks": checks}
+    )
+
 @app.get("/docs", include_in_schema=False)
 async def docs_redirect():
     """Redirect to API documentation"""
@@ -48,14 +170,15 @@ async def upload_doc(
             status_code=400,
             content={"error": "group_id ist erforderlich wenn scope=group", "success": False}
         )
-
+    
     file_bytes = await doc_file.read()
     filename = doc_file.filename or ""
     ext = os.path.splitext(filename)[1].lower()
 
     if ext == ".pdf":
-        # PDF-Text extrahieren
+        # PDF-Text extrahieren (pdfminer erst bei Bedarf importieren)
         import io
+        from pdfminer.high_level import extract_text
         pdf_stream = io.BytesIO(file_bytes)
         try:
             text = extract_text(pdf_stream)
@@ -84,6 +207,11 @@ async def upload_doc(
             content={"error": "Die Datei enthält keinen extrahierbaren Text.", "success": False}
         )
 
+    # Rate Limit erst nach der Validierung: abgelehnte Uploads verbrauchen keine Tokens
+    retry_after = check_rate_limit(tenant_id, "upload")
+    if retry_after:
+        return rate_limited_response(tenant_id, retry_after)
+
     # Intelligente Chunk-Strategie: Nach Absätzen, intelligent zusammengefasst
     def create_smart_chunks(text, min_chunk_size=300, max_chunk_size=2000):
         """
@@ -165,44 +293,61 @@ async def upload_doc(
     
     chunks = create_smart_chunks(text, min_chunk_size=300, max_chunk_size=2000)
     
-    # Erstelle valid collection_name für ChromaDB (3-512 chars, alphanumeric/._-, must start/end with alphanumeric)
-    # Entferne leading underscores und trailing hyphens/underscores
-    clean_tenant_id = tenant_id.rstrip('-_').lstrip('_')
-    clean_user_id = user_id.rstrip('-_').lstrip('_')
-    collection_name = f"{clean_tenant_id}_{scope}_{clean_user_id}".replace('--', '-').replace('__', '_')
-    # Stelle sicher dass Name mit alphanumerisch anfängt und endet
-    collection_name = ''.join(c for c in collection_name if c.isalnum() or c in '._-')
-    collection_name = collection_name.lstrip('._-').rstrip('._-')
+    collection_name = build_collection_name(tenant_id, scope, user_id)
     
     col = get_collection(collection_name)
     # Bestimme Dateityp
     file_ext = os.path.splitext(filename)[1].lower() or "unknown"
-    upload_date = datetime.now().isoformat()
+    upload_time = datetime.now()
+    upload_date = upload_time.isoformat()
     file_size = len(file_bytes)
     file_id = str(uuid.uuid4())  # Eindeutige ID für die gesamte Datei
     
+    # Speicher-Quota des Mandanten prüfen und reservieren
+    chunk_sizes = [len(c.encode("utf-8")) for c in chunks]
     try:
-        for c in chunks:
-            emb = embed_text(c)
-            chunk_id = str(uuid.uuid4())
-            metadata = {
+        await asyncio.to_thread(reserve_storage, tenant_id, len(chunks), sum(chunk_sizes))
+    except QuotaExceededError as e:
+        return JSONResponse(
+            status_code=403,
+            content={"error": str(e), "success": False}
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Fehler beim Prüfen der Speicher-Quota: {str(e)}", "success": False}
+        )
+    
+    try:
+        # Bulk-Ingestion: niedrigere Priorität als interaktive Queries
+        embeddings = await embed_in_batches(chunks, BULK)
+        metadatas = [
+            {
                 "file_id": file_id,  # Datei-ID zur Identifikation
                 "filename": filename,
                 "file_type": file_ext,
                 "file_size": file_size,
+                "chunk_bytes": chunk_size,  # Für Speicher-Quotas
                 "upload_date": upload_date,
+                "upload_ts": upload_time.timestamp(),  # Numerisch für Datumsfilter in /query
                 "tenant_id": tenant_id,
                 "user_id": user_id,
                 "scope": scope,
                 "group_id": group_id or "N/A"
             }
-            col.add(
-                ids=[chunk_id],
-                embeddings=[emb],
-                documents=[c],
-                metadatas=[metadata]
-            )
+            for chunk_size in chunk_sizes
+        ]
+        # Optional gekürzt/quantisiert speichern (siehe compression.py)
+        await asyncio.to_thread(
+            add_chunks,
+            col,
+            [str(uuid.uuid4()) for _ in chunks],
+            embeddings,
+            chunks,
+            metadatas
+        )
     except Exception as e:
+        release_storage(tenant_id, len(chunks), sum(chunk_sizes))
         return JSONResponse(
             status_code=500,
             content={"error": f"Fehler bei IONOS AI Embedding: {str(e)}", "success": False}
@@ -229,13 +374,132 @@ async def upload_doc(
         }
     )
 
+def prepare_query_options(n_results, file_type, file_id, upload_date_from, upload_date_to,
+                          include, snippet_length, min_similarity, rerank=False, rerank_candidates=None):
+    """
+    Validiert die optionalen Query-Parameter von /query und /query/batch.
+    
+    Returns:
+        tuple: (angeforderte Felder, include-Liste für ChromaDB, where-Filter,
+                Anzahl der bei ChromaDB abzufragenden Kandidaten)
+    
+    Raises:
+        ValueError: Falls ein Parameter ungültig ist
+    """
+    settings = get_settings()
+    if not 1 <= n_results <= settings.query_max_n_results:
+        raise ValueError(f"n_results muss zwischen 1 und {settings.query_max_n_results} liegen")
+    if snippet_length is not None and snippet_length < 1:
+        raise ValueError("snippet_length muss größer als 0 sein")
+    if min_similarity is not None and not 0 <= min_similarity <= 1:
+        raise ValueError("min_similarity muss zwischen 0 und 1 liegen")
+    
+    fields = parse_include(include)
+    where = build_where_filter(file_type, file_id, upload_date_from, upload_date_to)
+    
+    # Distanzen werden für den Ähnlichkeitsfilter benötigt, auch wenn nicht angefordert
+    query_include = list(fields)
+    if min_similarity is not None and "distances" not in query_include:
+        query_include.append("distances")
+    
+    fetch_n = n_results
+    if rerank:
+        # Kandidaten-Pool überabfragen; der Re-Ranker braucht die Dokument-Texte
+        if rerank_candidates is None:
+            rerank_candidates = settings.rerank_candidates
+        if rerank_candidates < 1:
+            raise ValueError("rerank_candidates muss größer als 0 sein")
+        fetch_n = min(max(n_results, rerank_candidates), settings.query_max_n_results)
+        if "documents" not in query_include:
+            query_include.append("documents")
+    
+    return fields, query_include, where, fetch_n
+
+async def run_query(collection_name, question, n_results, file_type, file_id, upload_date_from,
+                    upload_date_to, include, snippet_length, min_similarity, rerank,
+                    rerank_candidates, rerank_budget_ms, started, tenant_id=None):
+    """
+    Führt eine einzelne semantische Suche in einer Collection aus
+    (gemeinsamer Pfad für /query und /collections/{name}/query).
+    
+    Mit `tenant_id` wird nach der Validierung das Query-Rate-Limit des
+    Mandanten geprüft, sodass ungültige Anfragen keine Tokens verbrauchen.
+    
+    Returns:
+        JSONResponse: Ergebnis oder Fehlermeldung
+    """
+    if not question or not question.strip():
+        return JSONResponse(
+            status_code=400,
+            content={"error": "question darf nicht leer sein", "success": False}
+        )
+    
+    settings = get_settings()
+    n_results = settings.query_default_n_results if n_results is None else n_results
+    try:
+        fields, query_include, where, fetch_n = prepare_query_options(
+            n_results, file_type, file_id, upload_date_from, upload_date_to,
+            include, snippet_length, min_similarity, rerank, rerank_candidates
+        )
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e), "success": False}
+        )
+    
+    if tenant_id is not None:
+        retry_after = check_rate_limit(tenant_id, "query")
+        if retry_after:
+            return rate_limited_response(tenant_id, retry_after)
+    
+    try:
+        emb = await run_embedding(INTERACTIVE, 1, embed_query, question)
+        col = get_collection(collection_name)
+        # Re-Scoring (Dekodieren der Vollkopien) nicht auf dem Event Loop ausführen
+        results = await asyncio.to_thread(search, col, [emb], fetch_n, where, query_include)
+        
+        reranked = False
+        if rerank:
+            budget_ms = settings.rerank_budget_ms if rerank_budget_ms is None else rerank_budget_ms
+            results, reranked = await rerank_results(
+                results, [question], n_results, started + budget_ms / 1000
+            )
+        
+        return JSONResponse(
+            status_code=200,
+            content={
+                "success": True,
+                "question": question,
+                **shape_results(results, fields, snippet_length, min_similarity),
+                "reranked": reranked
+            }
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Fehler bei Query: {str(e)}", "success": False}
+        )
+
 @app.post("/query")
 async def query_docs(
     tenant_id: str = Form(...),
     user_id: str = Form(...),
     scope: str = Form(...),
-    question: str = Form(...)
+    question: str = Form(...),
+    n_results: int = Form(None),
+    file_type: str = Form(None),
+    file_id: str = Form(None),
+    upload_date_from: str = Form(None),
+    upload_date_to: str = Form(None),
+    include: str = Form(None),
+    snippet_length: int = Form(None),
+    min_similarity: float = Form(None),
+    rerank: bool = Form(False),
+    rerank_candidates: int = Form(None),
+    rerank_budget_ms: int = Form(None)
 ):
+    started = time.monotonic()
+    
     # Validiere Parameter
     if scope not in ["user", "group", "company"]:
         return JSONResponse(
@@ -243,31 +507,307 @@ async def query_docs(
             content={"error": f"Ungültiger scope '{scope}'. Erlaubt sind: user, group, company", "success": False}
         )
     
-    if not question or not question.strip():
+    return await run_query(
+        f"{tenant_id}_{scope}_{user_id}", question, n_results, file_type, file_id,
+        upload_date_from, upload_date_to, include, snippet_length, min_similarity,
+        rerank, rerank_candidates, rerank_budget_ms, started, tenant_id=tenant_id
+    )
+
+@app.post("/query/batch")
+async def query_docs_batch(req: BatchQuery):
+    """
+    Beantwortet viele Fragen in einem Request.
+    
+    Alle Fragen werden mit möglichst wenigen Embedding-Aufrufen embedded und
+    pro Collection mit einem einzigen `col.query()` abgefragt. Die Ergebnisse
+    werden in der Reihenfolge der Eingabe zurückgegeben.
+    """
+    started = time.monotonic()
+    
+    if not req.questions:
         return JSONResponse(
             status_code=400,
-            content={"error": "question darf nicht leer sein", "success": False}
+            content={"error": "questions darf nicht leer sein", "success": False}
         )
     
+    settings = get_settings()
+    if len(req.questions) > settings.query_batch_max_questions:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"Maximal {settings.query_batch_max_questions} Fragen pro Batch erlaubt", "success": False}
+        )
+    
+    # Fragen normalisieren: Felder, die nicht gesetzt sind, erben vom Request
+    items = [q if isinstance(q, BatchQuestion) else BatchQuestion(question=q) for q in req.questions]
+    for index, item in enumerate(items):
+        scope = item.scope or req.scope
+        if scope not in ["user", "group", "company"]:
+            return JSONResponse(
+                status_code=400,
+                content={"error": f"Ungültiger scope '{scope}' bei Frage {index}. Erlaubt sind: user, group, company", "success": False}
+            )
+        if not item.question or not item.question.strip():
+            return JSONResponse(
+                status_code=400,
+                content={"error": f"question darf nicht leer sein (Frage {index})", "success": False}
+            )
+    
+    n_results = settings.query_default_n_results if req.n_results is None else req.n_results
     try:
-        emb = embed_text(question)
-        collection_name = f"{tenant_id}_{scope}_{user_id}"
-        col = get_collection(collection_name)
-        results = col.query(query_embeddings=[emb], n_results=5)
+        fields, query_include, where, fetch_n = prepare_query_options(
+            n_results, req.file_type, req.file_id, req.upload_date_from, req.upload_date_to,
+            req.include, req.snippet_length, req.min_similarity, req.rerank, req.rerank_candidates
+        )
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e), "success": False}
+        )
+    
+    # Rate Limit pro Mandant: jede Frage verbraucht ein Token
+    questions_per_tenant = {}
+    for item in items:
+        tenant_id = item.tenant_id or req.tenant_id
+        questions_per_tenant[tenant_id] = questions_per_tenant.get(tenant_id, 0) + 1
+    # Erst alle Mandanten prüfen, dann verbrauchen: eine Ablehnung kostet keine Tokens
+    try:
+        tenant_id, retry_after = check_rate_limits(questions_per_tenant, "query")
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"Batch größer als das Burst-Limit: {str(e)}", "success": False}
+        )
+    if retry_after:
+        return rate_limited_response(tenant_id, retry_after)
+    
+    # Fragen nach Ziel-Collection gruppieren (Positionen in der Eingabe merken)
+    groups = {}
+    for index, item in enumerate(items):
+        collection_name = f"{item.tenant_id or req.tenant_id}_{item.scope or req.scope}_{item.user_id or req.user_id}"
+        groups.setdefault(collection_name, []).append(index)
+    
+    try:
+        # Batch-Queries (Evaluation) teilen sich die Kapazität mit Uploads, nicht mit interaktiven Queries
+        embeddings = await embed_in_batches([item.question for item in items], BULK)
+        
+        results = [None] * len(items)
+        for collection_name, positions in groups.items():
+            col = get_collection(collection_name)
+            raw = await asyncio.to_thread(search, col, [embeddings[i] for i in positions], fetch_n, where, query_include)
+            reranked = False
+            if req.rerank:
+                budget_ms = settings.rerank_budget_ms if req.rerank_budget_ms is None else req.rerank_budget_ms
+                raw, reranked = await rerank_results(
+                    raw, [items[i].question for i in positions], n_results, started + budget_ms / 1000
+                )
+            shaped = shape_results(raw, fields, req.snippet_length, req.min_similarity)
+            for q_index, position in enumerate(positions):
+                entry = {"question": items[position].question, "ids": shaped["ids"][q_index]}
+                for field in fields:
+                    entry[field] = shaped[field][q_index]
+                entry["results_count"] = len(entry["ids"])
+                entry["reranked"] = reranked
+                results[position] = entry
         
         return JSONResponse(
             status_code=200,
             content={
                 "success": True,
-                "question": question,
-                "documents": results.get("documents", []),
-                "metadatas": results.get("metadatas", []),
-                "distances": results.get("distances", []),
-                "results_count": len(results.get("documents", [[]])[0]) if results.get("documents") else 0
+                "results": results,
+                "questions_count": len(items)
             }
         )
     except Exception as e:
         return JSONResponse(
             status_code=500,
-            content={"error": f"Fehler bei Query: {str(e)}", "success": False}
+            content={"error": f"Fehler bei Batch-Query: {str(e)}", "success": False}
+        )
+
+# ==================== COLLECTIONS (Dashboard / Verwaltung) ====================
+
+_basic_auth = HTTPBasic()
+
+def require_admin(credentials: HTTPBasicCredentials = Depends(_basic_auth)):
+    """
+    Schützt die Verwaltungs-Endpoints mit den Dashboard-Zugangsdaten
+    (WEBUI_USERNAME / WEBUI_PASSWORD, HTTP Basic Auth).
+    """
+    settings = get_settings()
+    valid_username = secrets.compare_digest(credentials.username.encode(), settings.webui_username.encode())
+    valid_password = secrets.compare_digest(credentials.password.encode(), settings.webui_password.encode())
+    if not (valid_username and valid_password):
+        raise HTTPException(
+            status_code=401,
+            detail="Ungültige Zugangsdaten",
+            headers={"WWW-Authenticate": "Basic"}
+        )
+
+# Alle Collection-Endpoints greifen mandantenübergreifend auf ChromaDB zu
+# Die Handler sind bewusst synchron (def): FastAPI führt sie im Threadpool aus,
+# damit die blockierenden ChromaDB-Aufrufe des Dashboards keine Queries/Uploads aufhalten
+admin_router = APIRouter(prefix="/collections", dependencies=[Depends(require_admin)])
+
+@admin_router.get("")
+def list_collections():
+    """Listet die Namen aller Collections auf."""
+    try:
+        client = get_chroma_client()
+        # Je nach ChromaDB Version Collection-Objekte oder Namen
+        collections = [client.get_collection(c) if isinstance(c, str) else c for c in client.list_collections()]
+        # Begleit-Collections der Embedding-Kompression ausblenden
+        names = sorted(c.name for c in collections if not is_copies_collection(c))
+        return {"success": True, "collections": names, "collections_count": len(names)}
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Fehler beim Laden der Collections: {str(e)}", "success": False}
         )
+
+@admin_router.get("/{name}")
+def collection_stats(name: str):
+    """Gibt Statistiken einer Collection zurück (Anzahl Chunks)."""
+    try:
+        col = get_chroma_client().get_collection(name)
+        return {"success": True, "name": name, "chunks_count": col.count()}
+    except Exception as e:
+        return JSONResponse(
+            status_code=404,
+            content={"error": f"Collection '{name}' nicht gefunden: {str(e)}", "success": False}
+        )
+
+@admin_router.get("/{name}/chunks")
+def list_chunks(
+    name: str,
+    offset: int = 0,
+    limit: int = 20,
+    file_id: str = None,
+    include_metadata: bool = False
+):
+    """
+    Gibt eine Seite von Chunks einer Collection zurück (paginiert über offset/limit).
+    Optional auf eine Datei (file_id) eingeschränkt.
+    """
+    max_page_size = get_settings().collection_max_page_size
+    if offset < 0 or not 1 <= limit <= max_page_size:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"offset muss >= 0 und limit zwischen 1 und {max_page_size} liegen", "success": False}
+        )
+    
+    include = ["documents", "metadatas"] if include_metadata else ["documents"]
+    try:
+        col = get_chroma_client().get_collection(name)
+        data = col.get(
+            offset=offset,
+            limit=limit,
+            where={"file_id": file_id} if file_id else None,
+            include=include
+        )
+        return {
+            "success": True,
+            "name": name,
+            "offset": offset,
+            "limit": limit,
+            "ids": data["ids"],
+            "documents": data["documents"],
+            "metadatas": data["metadatas"] if include_metadata else None,
+            "chunks_count": len(data["ids"])
+        }
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Fehler beim Laden der Chunks: {str(e)}", "success": False}
+        )
+
+@admin_router.get("/{name}/files")
+def list_files(name: str):
+    """
+    Fasst die Chunks einer Collection pro Datei zusammen. Es werden nur die
+    Metadaten seitenweise geladen, keine Dokument-Texte oder Embeddings.
+    """
+    page_size = get_settings().collection_max_page_size
+    try:
+        col = get_chroma_client().get_collection(name)
+        files = {}
+        offset = 0
+        while True:
+            page = col.get(offset=offset, limit=page_size, include=["metadatas"])
+            for metadata in page["metadatas"]:
+                metadata = metadata or {}
+                key = metadata.get("file_id") or metadata.get("filename") or "Unknown"
+                if key not in files:
+                    files[key] = {
+                        "file_id": metadata.get("file_id"),
+                        "filename": metadata.get("filename", "Unknown"),
+                        "file_type": metadata.get("file_type"),
+                        "file_size": metadata.get("file_size"),
+                        "upload_date": metadata.get("upload_date"),
+                        "user_id": metadata.get("user_id"),
+                        "scope": metadata.get("scope"),
+                        "chunks_count": 0
+                    }
+                files[key]["chunks_count"] += 1
+            if len(page["ids"]) < page_size:
+                break
+            offset += page_size
+        
+        return {"success": True, "name": name, "files": list(files.values()), "files_count": len(files)}
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Fehler beim Laden der Dateien: {str(e)}", "success": False}
+        )
+
+def _owning_tenant(col, **selector):
+    """Ermittelt den Mandanten zu löschender Chunks, damit nur dessen Quota-Belegung verworfen wird."""
+    metadatas = col.get(limit=1, include=["metadatas"], **selector)["metadatas"]
+    return (metadatas[0] or {}).get("tenant_id") if metadatas else None
+
+@admin_router.delete("/{name}/files/{file_id}")
+def delete_file(name: str, file_id: str):
+    """Löscht alle Chunks einer Datei."""
+    try:
+        col = get_chroma_client().get_collection(name)
+        tenant_id = _owning_tenant(col, where={"file_id": file_id})
+        delete_chunks(col, where={"file_id": file_id})
+        if tenant_id is not None:
+            invalidate_usage(tenant_id)
+        return {"success": True, "message": f"Datei {file_id} gelöscht."}
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Fehler beim Löschen: {str(e)}", "success": False}
+        )
+
+@admin_router.delete("/{name}/chunks/{chunk_id}")
+def delete_chunk(name: str, chunk_id: str):
+    """Löscht einen einzelnen Chunk."""
+    try:
+        col = get_chroma_client().get_collection(name)
+        tenant_id = _owning_tenant(col, ids=[chunk_id])
+        delete_chunks(col, ids=[chunk_id])
+        if tenant_id is not None:
+            invalidate_usage(tenant_id)
+        return {"success": True, "message": f"Chunk {chunk_id} gelöscht."}
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Fehler beim Löschen: {str(e)}", "success": False}
+        )
+
+@admin_router.post("/{name}/query")
+async def query_collection(
+    name: str,
+    question: str = Form(...),
+    n_results: int = Form(None),
+    include: str = Form(None),
+    snippet_length: int = Form(None),
+    min_similarity: float = Form(None)
+):
+    """Semantische Suche direkt in einer Collection (für den Dashboard-Explorer)."""
+    return await run_query(
+        name, question, n_results, None, None, None, None, include,
+        snippet_length, min_similarity, False, None, None, time.monotonic()
+    )
+
+app.include_router(admin_router)
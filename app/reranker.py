@@ -0,0 +1,212 @@
+"""
+Re-Ranking Modul
+================
+Optionale zweite Stufe nach der Vektorsuche: Aus einem überabgefragten
+Kandidaten-Pool werden die Treffer neu bewertet und nur die finalen top-k
+zurückgegeben.
+
+Verfügbare Re-Ranker (Einstellung RERANKER):
+- "lexical": Günstiger Score über die Wortüberlappung zwischen Frage und Chunk
+- "cross-encoder": Lokaler CPU Cross-Encoder (benötigt `sentence-transformers`),
+  wird in Batches auf einem begrenzten Thread-Pool ausgeführt
+
+Funktionen:
+- get_reranker(): Gibt den konfigurierten Re-Ranker zurück
+- get_executor() / shutdown_executor(): Verwalten den Thread-Pool für das Scoring
+- rerank_results(): Sortiert ein ChromaDB Query-Ergebnis neu und kürzt auf top-k
+"""
+
+import re
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import get_settings
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_executor = None
+
+
+def get_executor():
+    """
+    Gibt den begrenzten Thread-Pool für das Scoring zurück (beim ersten Aufruf erstellt),
+    damit Re-Ranking die CPU nicht für Uploads/Queries blockiert.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().reranker_max_workers, thread_name_prefix="reranker"
+        )
+    return _executor
+
+
+def shutdown_executor():
+    """Beendet den Thread-Pool (beim Herunterfahren der Anwendung)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class LexicalReranker:
+    """Bewertet Chunks nach dem Anteil der Frage-Wörter, die im Chunk vorkommen."""
+
+    def score(self, query, documents):
+        """
+        Args:
+            query (str): Die Suchfrage
+            documents (list): Kandidaten-Chunks
+
+        Returns:
+            list: Ein Score pro Dokument (höher = relevanter)
+        """
+        query_tokens = set(_TOKEN_RE.findall(query.lower()))
+        if not query_tokens:
+            return [0.0] * len(documents)
+        return [
+            len(query_tokens & set(_TOKEN_RE.findall((doc or "").lower()))) / len(query_tokens)
+            for doc in documents
+        ]
+
+
+class CrossEncoderReranker:
+    """Bewertet (Frage, Chunk)-Paare mit einem lokalen Cross-Encoder Modell."""
+
+    def __init__(self, model_name, batch_size):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Lädt das Modell (schwerer Import, mehrere Sekunden). Wird beim Start
+        vom Warm-up aufgerufen, sonst beim ersten Scoring.
+        """
+        with self._lock:
+            if self._model is None:
+                try:
+                    from sentence_transformers import CrossEncoder
+                except ImportError:
+                    raise RuntimeError(
+                        "Re-Ranker 'cross-encoder' benötigt das Paket 'sentence-transformers'"
+                    )
+                self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def score(self, query, documents):
+        """
+        Args:
+            query (str): Die Suchfrage
+            documents (list): Kandidaten-Chunks
+
+        Returns:
+            list: Ein Score pro Dokument (höher = relevanter)
+        """
+        model = self.load()
+        pairs = [(query, doc or "") for doc in documents]
+        return [float(s) for s in model.predict(pairs, batch_size=self.batch_size)]
+
+
+_rerankers = {}
+
+
+def get_reranker(name=None):
+    """
+    Gibt den Re-Ranker mit dem angegebenen Namen zurück (gecacht).
+
+    Args:
+        name (str | None): "lexical" oder "cross-encoder" (Default: settings.reranker)
+
+    Returns:
+        LexicalReranker | CrossEncoderReranker: Der Re-Ranker
+
+    Raises:
+        ValueError: Falls der Name unbekannt ist
+    """
+    settings = get_settings()
+    name = name or settings.reranker
+    if name not in _rerankers:
+        if name == "lexical":
+            _rerankers[name] = LexicalReranker()
+        elif name == "cross-encoder":
+            _rerankers[name] = CrossEncoderReranker(settings.reranker_model, settings.reranker_batch_size)
+        else:
+            raise ValueError(f"Unbekannter Re-Ranker '{name}'. Erlaubt sind: lexical, cross-encoder")
+    return _rerankers[name]
+
+
+def _per_query_fields(results):
+    """Gibt die Felder zurück, die eine Liste pro Query-Embedding enthalten (ids, documents, ...)."""
+    return [
+        key for key, value in results.items()
+        if isinstance(value, list) and value and isinstance(value[0], list)
+    ]
+
+
+def _truncate(results, top_k):
+    """Kürzt alle Listen eines ChromaDB Query-Ergebnisses auf top_k Einträge."""
+    truncated = dict(results)
+    for key in _per_query_fields(results):
+        truncated[key] = [values[:top_k] for values in results[key]]
+    return truncated
+
+
+async def rerank_results(results, queries, top_k, deadline, reranker=None):
+    """
+    Sortiert ein ChromaDB Query-Ergebnis pro Frage neu und kürzt auf top_k.
+
+    Ist die Deadline bereits überschritten oder wird sie während des Scorings
+    erreicht, wird das Re-Ranking übersprungen und die Reihenfolge der
+    Vektorsuche beibehalten. Gescored wird in Blöcken von RERANKER_BATCH_SIZE;
+    nach Ablauf der Deadline bricht der Job nach dem laufenden Block ab und
+    gibt seinen Thread frei.
+
+    Args:
+        results (dict): Rohes Ergebnis von `collection.query()` (muss `documents` enthalten)
+        queries (list): Die Fragen, in derselben Reihenfolge wie die Query-Embeddings
+        top_k (int): Anzahl der finalen Treffer pro Frage
+        deadline (float): Zeitpunkt (`time.monotonic()`), bis zu dem gescored werden darf
+        reranker: Re-Ranker Instanz (Default: get_reranker())
+
+    Returns:
+        tuple: (Ergebnis im ChromaDB-Format, True falls neu sortiert wurde)
+    """
+    reranker = reranker or get_reranker()
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return _truncate(results, top_k), False
+
+    batch_size = get_settings().reranker_batch_size
+
+    def score_all():
+        scores = []
+        for query, docs in zip(queries, results["documents"]):
+            q_scores = []
+            for start in range(0, len(docs), batch_size):
+                if time.monotonic() >= deadline:
+                    return None  # Budget aufgebraucht, Thread nicht weiter belegen
+                q_scores.extend(reranker.score(query, docs[start:start + batch_size]))
+            scores.append(q_scores)
+        return scores
+
+    loop = asyncio.get_running_loop()
+    try:
+        scores = await asyncio.wait_for(loop.run_in_executor(get_executor(), score_all), timeout=remaining)
+    except asyncio.TimeoutError:
+        scores = None
+    if scores is None:
+        return _truncate(results, top_k), False
+
+    fields = _per_query_fields(results)
+    reranked = dict(results)
+    for key in fields:
+        reranked[key] = []
+    for q_index, q_scores in enumerate(scores):
+        # Stabile Sortierung: bei gleichem Score bleibt die Reihenfolge der Vektorsuche
+        order = sorted(range(len(q_scores)), key=lambda i: -q_scores[i])[:top_k]
+        for key in fields:
+            reranked[key].append([results[key][q_index][i] for i in order])
+    return reranked, True
@@ -0,0 +1,136 @@
+"""
+Retrieval Modul
+===============
+Hilfsfunktionen für den Query-Pfad: Aufbau von ChromaDB `where`-Filtern aus
+Request-Parametern und Reduktion der Query-Ergebnisse auf das, was der
+Aufrufer tatsächlich angefordert hat.
+
+Funktionen:
+- parse_include(): Validiert den `include`-Selektor einer Query
+- build_where_filter(): Erstellt einen ChromaDB Metadaten-Filter
+- shape_results(): Filtert, kürzt und reduziert ein ChromaDB Query-Ergebnis
+"""
+
+from datetime import datetime, timedelta
+
+# Felder, die ein Aufrufer über `include` anfordern kann
+INCLUDE_FIELDS = ("documents", "metadatas", "distances")
+
+
+def parse_include(include):
+    """
+    Validiert den `include`-Selektor (kommagetrennt, z.B. "documents,distances").
+
+    Args:
+        include (str | None): Kommagetrennte Feldnamen oder None für alle Felder
+
+    Returns:
+        list: Liste der angeforderten Felder in kanonischer Reihenfolge
+
+    Raises:
+        ValueError: Falls ein unbekanntes Feld angefordert wird
+    """
+    if include is None or not include.strip():
+        return list(INCLUDE_FIELDS)
+
+    requested = {field.strip() for field in include.split(",") if field.strip()}
+    unknown = requested - set(INCLUDE_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Ungültige include-Felder: {', '.join(sorted(unknown))}. "
+            f"Erlaubt sind: {', '.join(INCLUDE_FIELDS)}"
+        )
+    return [field for field in INCLUDE_FIELDS if field in requested]
+
+
+def _parse_date(value, name, end_of_day=False):
+    """
+    Wandelt ein ISO-Datum in einen Unix-Timestamp um (für `upload_ts`).
+    Bei reinen Datumsangaben (ohne Uhrzeit) und `end_of_day=True` wird das
+    Ende des Tages verwendet, damit der Bereich den ganzen Tag einschließt.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} ist kein gültiges ISO-Datum: '{value}'")
+    if end_of_day and "T" not in value and " " not in value.strip():
+        parsed += timedelta(days=1) - timedelta(microseconds=1)
+    return parsed.timestamp()
+
+
+def build_where_filter(file_type=None, file_id=None, upload_date_from=None, upload_date_to=None):
+    """
+    Erstellt einen ChromaDB `where`-Filter aus den optionalen Query-Parametern.
+
+    Datumsbereiche werden gegen das numerische Metadatenfeld `upload_ts`
+    geprüft, da ChromaDB Vergleichsoperatoren nur für Zahlen unterstützt.
+
+    Args:
+        file_type (str | None): Dateiendung, z.B. ".pdf" oder "pdf"
+        file_id (str | None): ID einer hochgeladenen Datei
+        upload_date_from (str | None): ISO-Datum, frühestes Upload-Datum (inklusive)
+        upload_date_to (str | None): ISO-Datum, spätestes Upload-Datum (inklusive)
+
+    Returns:
+        dict | None: ChromaDB `where`-Filter oder None, falls kein Filter gesetzt ist
+
+    Raises:
+        ValueError: Falls ein Datum nicht geparst werden kann
+    """
+    conditions = []
+    if file_type:
+        # Uploads speichern die Endung mit Punkt (".pdf")
+        conditions.append({"file_type": "." + file_type.lstrip(".").lower()})
+    if file_id:
+        conditions.append({"file_id": file_id})
+    if upload_date_from:
+        conditions.append({"upload_ts": {"$gte": _parse_date(upload_date_from, "upload_date_from")}})
+    if upload_date_to:
+        conditions.append({"upload_ts": {"$lte": _parse_date(upload_date_to, "upload_date_to", end_of_day=True)}})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def shape_results(results, include, snippet_length=None, min_similarity=None):
+    """
+    Reduziert ein ChromaDB Query-Ergebnis auf die angeforderten Felder.
+
+    Treffer unterhalb von `min_similarity` (Ähnlichkeit = 1 - Distanz) werden
+    entfernt, Dokumente auf `snippet_length` Zeichen gekürzt. Die
+    verschachtelte Listenstruktur von ChromaDB (eine Liste pro Query-Embedding)
+    bleibt erhalten.
+
+    Args:
+        results (dict): Rohes Ergebnis von `collection.query()`
+        include (list): Felder, die in die Antwort übernommen werden
+        snippet_length (int | None): Maximale Länge der Dokument-Snippets
+        min_similarity (float | None): Mindestähnlichkeit zwischen 0 und 1
+
+    Returns:
+        dict: Antwort-Payload mit `ids`, den angeforderten Feldern und `results_count`
+    """
+    ids = results.get("ids") or []
+    shaped = {"ids": []}
+    for field in include:
+        shaped[field] = []
+
+    for q_index, q_ids in enumerate(ids):
+        keep = range(len(q_ids))
+        if min_similarity is not None:
+            distances = results["distances"][q_index]
+            keep = [i for i in keep if 1 - distances[i] >= min_similarity]
+
+        shaped["ids"].append([q_ids[i] for i in keep])
+        for field in include:
+            values = results[field][q_index]
+            if field == "documents" and snippet_length:
+                shaped[field].append([(values[i] or "")[:snippet_length] for i in keep])
+            else:
+                shaped[field].append([values[i] for i in keep])
+
+    shaped["results_count"] = len(shaped["ids"][0]) if shaped["ids"] else 0
+    return shaped
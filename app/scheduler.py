@@ -0,0 +1,121 @@
+"""
+Scheduler Modul
+===============
+Gewichtetes Fair Scheduling der Embedding-Kapazität beim Provider (IONOS AI).
+
+Alle Embedding-Aufrufe teilen sich EMBEDDING_MAX_CONCURRENCY gleichzeitige
+Slots. Warten mehr Aufrufe als Slots frei sind, wird nach Weighted Fair
+Queueing entschieden: Jede Prioritätsklasse hat eine virtuelle Zeit, die pro
+Aufruf um `Kosten / Gewicht` steigt; der nächste Slot geht an die wartende
+Klasse mit der kleinsten virtuellen Zeit. Interaktive Query-Embeddings
+(Gewicht EMBEDDING_WEIGHT_INTERACTIVE) werden so gegenüber Bulk-Ingestion
+(EMBEDDING_WEIGHT_BULK) bevorzugt, ohne Uploads vollständig auszuhungern.
+
+Funktionen:
+- get_scheduler(): Gibt den (gecachten) Scheduler zurück
+- run_embedding(): Führt eine blockierende Embedding-Funktion im Thread aus,
+  sobald ein Slot für die Prioritätsklasse frei ist
+"""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+from .config import get_settings
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+
+class FairScheduler:
+    """Weighted Fair Queueing über eine feste Anzahl gleichzeitiger Slots."""
+
+    def __init__(self, max_concurrency, weights):
+        self.weights = weights
+        self._free = max_concurrency
+        self._queues = {name: deque() for name in weights}
+        self._vtime = {name: 0.0 for name in weights}
+        self._clock = 0.0
+
+    def _charge(self, priority, cost):
+        self._clock = max(self._clock, self._vtime[priority])
+        self._vtime[priority] += cost / self.weights[priority]
+
+    def _dispatch(self):
+        # Freie Slots an die wartende Klasse mit der kleinsten virtuellen Zeit vergeben
+        while self._free > 0:
+            waiting = [name for name, queue in self._queues.items() if queue]
+            if not waiting:
+                return
+            priority = min(waiting, key=lambda name: self._vtime[name])
+            future, cost = self._queues[priority].popleft()
+            if future.done():
+                continue  # Abgebrochen, während er gewartet hat
+            self._free -= 1
+            self._charge(priority, cost)
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority, cost=1):
+        """
+        Wartet auf einen Slot für die Prioritätsklasse und gibt ihn danach frei.
+
+        Args:
+            priority (str): INTERACTIVE oder BULK
+            cost (float): Kosten des Aufrufs, z.B. Anzahl Texte
+        """
+        queue = self._queues[priority]
+        if not queue:
+            # Klasse war untätig: kein Guthaben aus der Leerlaufzeit ansammeln
+            self._vtime[priority] = max(self._vtime[priority], self._clock)
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append((future, cost))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot wurde bereits vergeben, wieder freigeben
+                self._free += 1
+                self._dispatch()
+            raise
+
+        try:
+            yield
+        finally:
+            self._free += 1
+            self._dispatch()
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """Gibt den Scheduler zurück und erstellt ihn beim ersten Aufruf."""
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        _scheduler = FairScheduler(
+            settings.embedding_max_concurrency,
+            {INTERACTIVE: settings.embedding_weight_interactive, BULK: settings.embedding_weight_bulk}
+        )
+    return _scheduler
+
+
+async def run_embedding(priority, cost, func, *args):
+    """
+    Führt eine blockierende Embedding-Funktion in einem Thread aus, sobald
+    der Scheduler einen Slot für die Prioritätsklasse vergibt.
+
+    Args:
+        priority (str): INTERACTIVE oder BULK
+        cost (float): Kosten des Aufrufs (Anzahl Texte)
+        func: Embedding-Funktion, z.B. embed_query oder embed_texts
+        *args: Argumente für func
+
+    Returns:
+        Rückgabewert von func
+    """
+    async with get_scheduler().slot(priority, cost):
+        return await asyncio.to_thread(func, *args)
@@ -5,3 +5,27 @@ class UploadDoc(BaseModel):
     user_id: str
     scope: str
     group_id: str | None
+
+class BatchQuestion(BaseModel):
+    """Einzelne Frage einer Batch-Query; nicht gesetzte Felder erben vom Request"""
+    question: str
+    tenant_id: str | None = None
+    user_id: str | None = None
+    scope: str | None = None
+
+class BatchQuery(BaseModel):
+    tenant_id: str
+    user_id: str
+    scope: str
+    questions: list[str | BatchQuestion]
+    n_results: int | None = None
+    file_type: str | None = None
+    file_id: str | None = None
+    upload_date_from: str | None = None
+    upload_date_to: str | None = None
+    include: str | None = None
+    snippet_length: int | None = None
+    min_similarity: float | None = None
+    rerank: bool = False
+    rerank_candidates: int | None = None
+    rerank_budget_ms: int | None = None
@@ -0,0 +1,138 @@
+"""
+Benchmark: Embedding-Kompression
+================================
+Vergleicht Speicherbedarf und recall@k der Kompressionsmodi aus
+app/compression.py auf den Chunks einer bestehenden Collection.
+
+Als Referenz dient die exakte Suche mit vollen float32 Embeddings. Gesucht
+und neu bewertet wird wie in search() mit dem Distanzmaß der Collection
+(hnsw:space), die Vollkopien durchlaufen dieselbe Kodierung wie beim Upload.
+Die Kopie-Größe ist die Länge des gespeicherten Base64-Strings. Ohne
+Query-Datei werden zufällige Chunks als Held-out Queries aus dem Korpus
+entfernt und als Suchanfragen verwendet.
+
+Starten mit:
+    python benchmark_compression.py --collection acme_corp_company_john_doe
+    python benchmark_compression.py --collection ... --queries fragen.txt --k 10 --dims 128,256,512
+
+Benötigt eine gültige .env (ChromaDB und IONOS AI), die Embeddings werden neu berechnet.
+"""
+
+import argparse
+import random
+
+import numpy as np
+
+from app.chroma_client import get_client
+from app.compression import truncate, encode_copies, decode_copy, _distance
+from app.config import get_settings
+from app.embeddings import embed_texts
+
+
+def load_documents(collection_name, page_size=500):
+    """
+    Lädt alle Chunk-Texte einer Collection seitenweise.
+
+    Returns:
+        tuple: (Liste der Chunk-Texte, Distanzmaß der Collection)
+    """
+    col = get_client().get_collection(collection_name)
+    space = (col.metadata or {}).get("hnsw:space", "l2")
+    documents = []
+    offset = 0
+    while True:
+        page = col.get(offset=offset, limit=page_size, include=["documents"])
+        documents.extend(doc for doc in page["documents"] if doc)
+        if len(page["ids"]) < page_size:
+            return documents, space
+        offset += page_size
+
+
+def top_k(queries, corpus, k, space):
+    """Exakte Top-k Suche mit dem Distanzmaß der Collection (wie ChromaDB)."""
+    return np.array([np.argsort(_distance(space, query, corpus))[:k] for query in queries])
+
+
+def rescored_top_k(queries, corpus, index_dims, k, candidates, space, stored=None):
+    """
+    Simuliert search() aus app/compression.py: Kandidaten aus dem gekürzten
+    Index, optional Re-Scoring mit der dekodierten Vollkopie.
+    """
+    pool = top_k(truncate(queries, index_dims), truncate(corpus, index_dims), max(k, candidates) if stored is not None else k, space)
+    if stored is None:
+        return pool
+    result = []
+    for q_index, ids in enumerate(pool):
+        distances = _distance(space, queries[q_index], stored[ids])
+        result.append(ids[np.argsort(distances)[:k]])
+    return np.array(result)
+
+
+def recall_at_k(found, expected):
+    """Anteil der exakten Top-k Treffer, die gefunden wurden."""
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+    return hits / expected.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark für Embedding-Kompression")
+    parser.add_argument("--collection", required=True, help="Name der Collection mit den Chunks")
+    parser.add_argument("--queries", help="Textdatei mit einer Frage pro Zeile (optional)")
+    parser.add_argument("--holdout", type=int, default=50, help="Anzahl Held-out Chunks als Queries ohne --queries")
+    parser.add_argument("--k", type=int, default=5, help="k für recall@k")
+    parser.add_argument("--dims", default="256,512", help="Kommagetrennte Index-Dimensionen (Matryoshka)")
+    parser.add_argument("--candidates", type=int, default=None, help="Re-Scoring Kandidaten (Default: RESCORE_CANDIDATES)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    candidates = args.candidates or get_settings().rescore_candidates
+    documents, space = load_documents(args.collection)
+
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+    else:
+        random.Random(args.seed).shuffle(documents)
+        questions, documents = documents[:args.holdout], documents[args.holdout:]
+
+    if len(documents) <= args.k or not questions:
+        raise SystemExit("Zu wenige Chunks oder Queries für den Benchmark.")
+
+    print(f"Korpus: {len(documents)} Chunks, Queries: {len(questions)}, k={args.k}, Distanz: {space}")
+    corpus = np.asarray(embed_texts(documents), dtype=np.float32)
+    queries = np.asarray(embed_texts(questions), dtype=np.float32)
+    full_dims = corpus.shape[1]
+    expected = top_k(queries, corpus, args.k, space)
+
+    # Vollkopien wie beim Upload kodieren (Base64) und wie in search() dekodieren
+    copies = {}
+    copy_bytes = {}
+    for mode in ("float16", "int8"):
+        encoded = encode_copies(corpus, mode)
+        copies[mode] = np.stack([decode_copy(value, mode) for value in encoded])
+        copy_bytes[mode] = round(sum(len(value) for value in encoded) / len(encoded))
+
+    # (Name, Index-Bytes, Kopie-Bytes, recall, True falls ein gespeichertes Format)
+    rows = [("float32 (Referenz)", full_dims * 4, 0, 1.0, True)]
+    for mode, stored in copies.items():
+        # Suche direkt auf der quantisierten Vollkopie: kein speicherbares Format (ChromaDB
+        # speichert den Index immer als float32), nur Referenz für den Quantisierungsfehler
+        rows.append((f"{mode} (nur Quant.-Fehler)", None, None, recall_at_k(top_k(queries, stored, args.k, space), expected), False))
+    for dims in (int(d) for d in args.dims.split(",") if d.strip()):
+        rows.append((f"{dims}d", dims * 4, 0, recall_at_k(rescored_top_k(queries, corpus, dims, args.k, candidates, space), expected), True))
+        for mode, stored in copies.items():
+            found = rescored_top_k(queries, corpus, dims, args.k, candidates, space, stored)
+            rows.append((f"{dims}d + {mode} Re-Scoring", dims * 4, copy_bytes[mode], recall_at_k(found, expected), True))
+
+    # Ersparnis gegenüber float32 aus Index und Vollkopie zusammen
+    baseline = full_dims * 4
+    print(f"\n{'Modus':<28}{'Index B/Vektor':>16}{'Kopie B/Vektor':>16}{'Ersparnis':>11}{'recall@' + str(args.k):>12}")
+    for name, index_bytes, copy, recall, stored_format in rows:
+        if not stored_format:
+            print(f"{name:<28}{'-':>16}{'-':>16}{'-':>11}{recall:>12.3f}")
+            continue
+        print(f"{name:<28}{index_bytes:>16}{copy:>16}{1 - (index_bytes + copy) / baseline:>11.0%}{recall:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,27 +9,28 @@ Features:
 - Collections verwalten und erkunden (Explorer Tab)
 - Dateien und Chunks löschen
 - Metadaten anzeigen
-- Token-basierte Authentifizierung für ChromaDB
+
+Alle Daten werden über die TenantRAG REST API geladen (TENANTRAG_API_URL),
+das Dashboard spricht nicht direkt mit ChromaDB. Collection-Listen und
+Statistiken werden mit st.cache_data (TTL) gecacht, Chunks seitenweise geladen.
 
 Starten mit: streamlit run chroma_dashboard.py
 Erreichbar unter: http://localhost:8501
 """
 
 import os
-import sys
-import json
 import requests
-import chromadb
 import streamlit as st
 from dotenv import load_dotenv
 
 # Lade .env
 load_dotenv()
 
-# Füge parent directory zu sys.path hinzu, um app Module zu importieren
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+API_URL = os.getenv("TENANTRAG_API_URL", "http://localhost:8000").rstrip("/")
+CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "30"))
 
-from app.embeddings import embed_text
+# Die /collections Endpoints der API sind mit den WebUI-Zugangsdaten geschützt
+API_AUTH = (os.getenv("WEBUI_USERNAME", "admin"), os.getenv("WEBUI_PASSWORD", "password"))
 
 # ==================== AUTHENTIFIZIERUNG ====================
 
@@ -76,33 +77,71 @@ if not check_password():
 st.sidebar.button("🚪 Abmelden", on_click=lambda: st.session_state.update(password_correct=False))
 
 
-# Verbinde zu ChromaDB
-@st.cache_resource
-def get_chroma_client():
+# ==================== API ZUGRIFF ====================
+
+def api_get(path, **params):
     """
-    Erstellt eine gecachte Verbindung zu ChromaDB mit Token-Authentifizierung.
+    GET Request an die TenantRAG API.
     
     Returns:
-        chromadb.HttpClient: Der ChromaDB Client
-    """
-    chroma_url = os.getenv("CHROMA_URL", "http://localhost:8001")
-    chroma_token = os.getenv("CHROMA_AUTH_TOKEN", "")
-    chroma_header = os.getenv("CHROMA_AUTH_TOKEN_TRANSPORT_HEADER", "X-Token")
+        dict: JSON-Antwort
     
-    headers = {}
-    if chroma_token:
-        headers[chroma_header] = chroma_token
-    
-    if headers:
-        return chromadb.HttpClient(host=chroma_url, headers=headers)
-    else:
-        return chromadb.HttpClient(host=chroma_url)
+    Raises:
+        RuntimeError: Falls die API einen Fehler zurückgibt
+    """
+    response = requests.get(f"{API_URL}{path}", params=params, auth=API_AUTH, timeout=30)
+    if response.status_code != 200:
+        raise RuntimeError(response.json().get("error", response.text))
+    return response.json()
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_collections():
+    """Gecachte Liste aller Collection-Namen."""
+    return api_get("/collections")["collections"]
 
-client = get_chroma_client()
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_collection_stats(name):
+    """Gecachte Statistiken einer Collection."""
+    return api_get(f"/collections/{name}")
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_files(name):
+    """Gecachte Dateiübersicht einer Collection (nur Metadaten)."""
+    return api_get(f"/collections/{name}/files")["files"]
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_chunks(name, offset, limit, file_id=None):
+    """Gecachte Seite von Chunks einer Collection."""
+    params = {"offset": offset, "limit": limit}
+    if file_id:
+        params["file_id"] = file_id
+    return api_get(f"/collections/{name}/chunks", **params)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def search_collection(name, question, min_similarity, n_results=10):
+    """Gecachte semantische Suche (Ähnlichkeitsfilter wird serverseitig angewendet)."""
+    response = requests.post(
+        f"{API_URL}/collections/{name}/query",
+        data={"question": question, "n_results": n_results, "min_similarity": min_similarity},
+        auth=API_AUTH,
+        timeout=60
+    )
+    if response.status_code != 200:
+        raise RuntimeError(response.json().get("error", response.text))
+    return response.json()
+
+def api_delete(path):
+    """DELETE Request an die API; leert danach alle Daten-Caches."""
+    response = requests.delete(f"{API_URL}{path}", auth=API_AUTH, timeout=30)
+    if response.status_code != 200:
+        raise RuntimeError(response.json().get("error", response.text))
+    st.cache_data.clear()
 
 # Sidebar
 st.sidebar.title("ChromaDB Explorer")
-st.sidebar.write(f"**Host:** {os.getenv('CHROMA_URL', 'http://localhost:8001')}")
+st.sidebar.write(f"**API:** {API_URL}")
+if st.sidebar.button("🔄 Aktualisieren"):
+    st.cache_data.clear()
 
 # Hauptinhalt
 st.title("🔍 ChromaDB Dashboard")
@@ -139,7 +178,10 @@ with main_tab1:
                 }
                 
                 # Sende zu Backend
-                response = requests.post('http://localhost:8000/upload', files=files, data=data)
+                response = requests.post(f'{API_URL}/upload', files=files, data=data)
+                
+                # Neue Chunks sollen im Explorer sofort sichtbar sein
+                st.cache_data.clear()
                 
                 if response.status_code == 200:
                     st.success("✅ Datei erfolgreich hochgeladen!")
@@ -176,13 +218,14 @@ with main_tab2:
                     'question': question
                 }
                 
-                response = requests.post('http://localhost:8000/query', json=data)
+                response = requests.post(f'{API_URL}/query', data=data)
                 
                 if response.status_code == 200:
                     results = response.json()
-                    st.success(f"✅ {len(results.get('documents', []))} Ergebnisse gefunden:")
+                    documents = results.get('documents', [[]])[0]
+                    st.success(f"✅ {len(documents)} Ergebnisse gefunden:")
                     
-                    for i, doc in enumerate(results.get('documents', [])[:5]):
+                    for i, doc in enumerate(documents):
                         with st.expander(f"📌 Ergebnis {i+1}"):
                             st.write(doc)
                 else:
@@ -196,97 +239,86 @@ with main_tab3:
     
     # Collections abrufen
     try:
-        collections = client.list_collections()
-        st.write(f"**Verfügbare Collections:** {len(collections)}")
+        col_names = fetch_collections()
+        st.write(f"**Verfügbare Collections:** {len(col_names)}")
         
-        if collections:
+        if col_names:
             # Dropdown für Collection-Auswahl
-            col_names = [c.name for c in collections]
             selected_col = st.selectbox("Wähle eine Collection:", col_names)
             
-            # Hole Selected Collection
-            col = client.get_collection(selected_col)
-            
             # Statistiken
+            stats = fetch_collection_stats(selected_col)
+            total_chunks = stats["chunks_count"]
             st.subheader(f"📊 Collection: {selected_col}")
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Dokumente", col.count())
-            with col2:
-                st.metric("IDs", len(col.get(limit=1)['ids']) if col.count() > 0 else 0)
+                st.metric("Dokumente", total_chunks)
             
             # Tabs für verschiedene Ansichten
             exp_tab1, exp_tab2 = st.tabs(["📁 Dateien", "📄 Alle Chunks"])
             
             with exp_tab1:
                 st.subheader("Hochgeladene Dateien")
-                data = col.get(limit=col.count())
+                files = fetch_files(selected_col)
                 
-                # Gruppiere nach Dateiname
-                files_dict = {}
-                for doc_id, document, metadata in zip(data['ids'], data['documents'], data['metadatas'] or [None]*len(data['ids'])):
-                    if metadata:
-                        filename = metadata.get('filename', 'Unknown')
-                        if filename not in files_dict:
-                            files_dict[filename] = []
-                        files_dict[filename].append((doc_id, document, metadata))
-                    else:
-                        if 'Unknown' not in files_dict:
-                            files_dict['Unknown'] = []
-                        files_dict['Unknown'].append((doc_id, document, metadata))
-                
-                if files_dict:
-                    for filename, chunks_list in files_dict.items():
-                        with st.expander(f"📄 {filename} ({len(chunks_list)} Chunks)"):
-                            if chunks_list[0][2]:  # Falls Metadaten vorhanden
-                                meta = chunks_list[0][2]
-                                st.write("**📋 Datei-Informationen:**")
-                                info_col1, info_col2 = st.columns(2)
-                                with info_col1:
-                                    st.write(f"- **Dateiname:** {meta.get('filename', 'N/A')}")
-                                    st.write(f"- **Typ:** {meta.get('file_type', 'N/A')}")
-                                    st.write(f"- **Größe:** {meta.get('file_size', 'N/A')} Bytes")
-                                with info_col2:
-                                    st.write(f"- **Hochgeladen:** {meta.get('upload_date', 'N/A')[:10]}")
-                                    st.write(f"- **User:** {meta.get('user_id', 'N/A')}")
-                                    st.write(f"- **Scope:** {meta.get('scope', 'N/A')}")
-                                st.divider()
-                                
-                                col1, col2, col3, col4 = st.columns(4)
-                                with col1:
-                                    st.metric("Chunks", len(chunks_list))
-                                with col2:
-                                    st.metric("Größe (Bytes)", meta.get('file_size', 'N/A'))
-                                with col3:
-                                    st.metric("Scope", meta.get('scope', 'N/A'))
-                                with col4:
-                                    if st.button(f"🗑️ Löschen", key=f"delete_{filename}"):
-                                        # Lösche alle Chunks dieser Datei
-                                        delete_ids = [chunk[0] for chunk in chunks_list]
-                                        try:
-                                            col.delete(ids=delete_ids)
-                                            st.success("✅ Datei gelöscht!")
-                                            st.rerun()
-                                        except Exception as e:
-                                            st.error(f"Fehler: {e}")
+                if files:
+                    for file_info in files:
+                        file_key = file_info.get('file_id') or file_info.get('filename')
+                        with st.expander(f"📄 {file_info.get('filename', 'Unknown')} ({file_info['chunks_count']} Chunks)"):
+                            st.write("**📋 Datei-Informationen:**")
+                            info_col1, info_col2 = st.columns(2)
+                            with info_col1:
+                                st.write(f"- **Dateiname:** {file_info.get('filename') or 'N/A'}")
+                                st.write(f"- **Typ:** {file_info.get('file_type') or 'N/A'}")
+                                st.write(f"- **Größe:** {file_info.get('file_size') or 'N/A'} Bytes")
+                            with info_col2:
+                                st.write(f"- **Hochgeladen:** {(file_info.get('upload_date') or 'N/A')[:10]}")
+                                st.write(f"- **User:** {file_info.get('user_id') or 'N/A'}")
+                                st.write(f"- **Scope:** {file_info.get('scope') or 'N/A'}")
+                            st.divider()
                             
-                            st.write("**Chunk-Vorschau:**")
-                            for i, (chunk_id, chunk_text, _) in enumerate(chunks_list[:3]):
-                                st.write(f"Chunk {i+1}: `{chunk_text[:150]}...`")
-                            if len(chunks_list) > 3:
-                                st.caption(f"... und {len(chunks_list) - 3} weitere Chunks")
+                            col1, col2, col3, col4 = st.columns(4)
+                            with col1:
+                                st.metric("Chunks", file_info['chunks_count'])
+                            with col2:
+                                st.metric("Größe (Bytes)", file_info.get('file_size') or 'N/A')
+                            with col3:
+                                st.metric("Scope", file_info.get('scope') or 'N/A')
+                            with col4:
+                                if file_info.get('file_id') and st.button(f"🗑️ Löschen", key=f"delete_{file_key}"):
+                                    # Lösche alle Chunks dieser Datei
+                                    try:
+                                        api_delete(f"/collections/{selected_col}/files/{file_info['file_id']}")
+                                        st.success("✅ Datei gelöscht!")
+                                        st.rerun()
+                                    except Exception as e:
+                                        st.error(f"Fehler: {e}")
+                            
+                            # Vorschau nur auf Anforderung laden
+                            if file_info.get('file_id') and st.checkbox("Chunk-Vorschau anzeigen", key=f"preview_{file_key}"):
+                                preview = fetch_chunks(selected_col, 0, 3, file_info['file_id'])
+                                for i, chunk_text in enumerate(preview['documents']):
+                                    st.write(f"Chunk {i+1}: `{chunk_text[:150]}...`")
+                                if file_info['chunks_count'] > 3:
+                                    st.caption(f"... und {file_info['chunks_count'] - 3} weitere Chunks")
                 else:
                     st.info("Keine Dateien mit Metadaten gefunden.")
             
             with exp_tab2:
                 st.subheader("Alle Chunks")
-                limit = st.slider("Wieviele Chunks anzeigen?", 5, 100, 20)
-                data = col.get(limit=limit)
+                page_col1, page_col2 = st.columns(2)
+                with page_col1:
+                    limit = st.selectbox("Chunks pro Seite", [10, 20, 50, 100], index=1)
+                pages = max(1, -(-total_chunks // limit))
+                with page_col2:
+                    page = st.number_input("Seite", min_value=1, max_value=pages, value=1, step=1)
+                
+                data = fetch_chunks(selected_col, (page - 1) * limit, limit)
                 
-                st.write(f"Zeige {len(data['documents'])} von {col.count()} Chunks:")
+                st.write(f"Zeige {len(data['documents'])} von {total_chunks} Chunks (Seite {page}/{pages}):")
                 
                 for i, (doc_id, document) in enumerate(zip(data['ids'], data['documents'])):
-                    with st.expander(f"📋 {i+1}. {document[:80]}..."):
+                    with st.expander(f"📋 {(page - 1) * limit + i + 1}. {document[:80]}..."):
                         col_left, col_right = st.columns([4, 1])
                         with col_left:
                             st.write(f"**ID:** `{doc_id}`")
@@ -295,7 +327,7 @@ with main_tab3:
                         with col_right:
                             if st.button("🗑️", key=f"delete_chunk_{doc_id}", help="Diesen Chunk löschen"):
                                 try:
-                                    col.delete(ids=[doc_id])
+                                    api_delete(f"/collections/{selected_col}/chunks/{doc_id}")
                                     st.success("✅ Chunk gelöscht!")
                                     st.rerun()
                                 except Exception as e:
@@ -314,54 +346,43 @@ with main_tab3:
                 st.info(f"Suche nach: '{search_query}'")
                 
                 try:
-                    # Embedd die Suchanfrage
-                    query_emb = embed_text(search_query)
-                    
-                    # Suche in ChromaDB
-                    results = col.query(query_embeddings=[query_emb], n_results=10)
+                    # Suche über die API (Embedding-Cache und Ähnlichkeitsfilter serverseitig)
+                    results = search_collection(selected_col, search_query, min_similarity)
                     
-                    if results['documents'] and results['documents'][0]:
-                        # Filtere nach Ähnlichkeitsschwelle
-                        filtered = []
-                        for doc, dist, meta in zip(results['documents'][0], results['distances'][0], results['metadatas'][0]):
-                            similarity = 1 - dist
-                            if similarity >= min_similarity:
-                                filtered.append((doc, similarity, meta))
+                    documents = results['documents'][0] if results['documents'] else []
+                    if documents:
+                        st.success(f"✅ {len(documents)} relevante Ergebnisse gefunden:")
                         
-                        if filtered:
-                            st.success(f"✅ {len(filtered)} von {len(results['documents'][0])} Ergebnissen relevante gefunden:")
+                        for i, (doc, dist, meta) in enumerate(zip(documents, results['distances'][0], results['metadatas'][0])):
+                            similarity_pct = (1 - dist) * 100
                             
-                            for i, (doc, similarity, meta) in enumerate(filtered):
-                                similarity_pct = similarity * 100
+                            with st.expander(f"📌 Ergebnis {i+1} ({similarity_pct:.1f}% Match)"):
+                                # Metadaten anzeigen (falls vorhanden)
+                                if meta:
+                                    st.write("**📄 Datei-Informationen:**")
+                                    st.write(f"- **Datei:** {meta.get('filename', 'N/A')}")
+                                    st.write(f"- **Type:** {meta.get('file_type', 'N/A')}")
+                                    st.write(f"- **Hochgeladen:** {meta.get('upload_date', 'N/A')[:10]}")
+                                    st.write(f"- **User:** {meta.get('user_id', 'N/A')}")
+                                    st.write(f"- **Scope:** {meta.get('scope', 'N/A')}")
                                 
-                                with st.expander(f"📌 Ergebnis {i+1} ({similarity_pct:.1f}% Match)"):
-                                    # Metadaten anzeigen (falls vorhanden)
-                                    if meta:
-                                        st.write("**📄 Datei-Informationen:**")
-                                        st.write(f"- **Datei:** {meta.get('filename', 'N/A')}")
-                                        st.write(f"- **Type:** {meta.get('file_type', 'N/A')}")
-                                        st.write(f"- **Hochgeladen:** {meta.get('upload_date', 'N/A')[:10]}")
-                                        st.write(f"- **User:** {meta.get('user_id', 'N/A')}")
-                                        st.write(f"- **Scope:** {meta.get('scope', 'N/A')}")
-                                    
-                                    # Hauptinhalt mit größerer Vorschau
-                                    st.write(f"**Ähnlichkeits-Score:** {similarity_pct:.1f}%")
-                                    st.write(f"**Dokument-Inhalt:**")
-                                    st.code(doc, language="text")
-                        else:
-                            st.warning(f"Keine Ergebnisse mit mindestens {min_similarity*100:.0f}% Ähnlichkeit gefunden.")
+                                # Hauptinhalt mit größerer Vorschau
+                                st.write(f"**Ähnlichkeits-Score:** {similarity_pct:.1f}%")
+                                st.write(f"**Dokument-Inhalt:**")
+                                st.code(doc, language="text")
+                    elif min_similarity > 0:
+                        st.warning(f"Keine Ergebnisse mit mindestens {min_similarity*100:.0f}% Ähnlichkeit gefunden.")
                     else:
                         st.warning("Keine ähnlichen Dokumente gefunden.")
                         
                 except Exception as e:
                     st.error(f"Fehler bei der Suche: {e}")
-                    st.write(f"Debug: {str(e)}")
         else:
             st.warning("Keine Collections gefunden. Lade zuerst Dokumente hoch.")
             
     except Exception as e:
-        st.error(f"Fehler beim Verbinden zu ChromaDB: {e}")
-        st.write("Stelle sicher, dass ChromaDB läuft und die CHROMA_URL korrekt ist.")
+        st.error(f"Fehler beim Laden der Daten über die API: {e}")
+        st.write("Stelle sicher, dass die TenantRAG API läuft und TENANTRAG_API_URL korrekt ist.")
 
 # Footer
 st.divider()